@@ -2,13 +2,19 @@
 Read unread inbox and responds to questions.
 """
 
+import asyncio
+import functools
+import hashlib
 import os
-import time
+import re
+from textwrap import dedent
+from typing import ClassVar
 
 from mirascope.openai import OpenAICall, OpenAICallParams
+from openai.types.chat import ChatCompletionMessageParam
 
 from miramail import MiraMail
-from miramail.gmail import Gmail
+from miramail.gmail import Gmail, label
 
 os.environ["OPENAI_API_KEY"] = "YOUR_API_KEY"
 
@@ -24,25 +30,85 @@ class Reply(OpenAICall):
     bullet points make sure to use <li> tags. Use <b> tags to emphasize
     words. Use <a> tags to link to other resources.
     
+    Before answering or calling any tool, check the earlier messages in the
+    thread and any previous tool responses. If they already contain the
+    information you need, reuse it instead of asking for it or requesting it
+    again.
+    
     USER:
     {content}
     """
 
     body: list[str]
-    call_params = OpenAICallParams(temperature=0.1)
+    # The static SYSTEM instructions come first so repeated calls share a prefix
+    # that OpenAI can serve from its prompt cache under this key.
+    call_params = OpenAICallParams(
+        temperature=0.1, extra_body={"prompt_cache_key": "miramail-reply-v1"}
+    )
+
+    # Only {content} varies, so split and dedent the template once here instead
+    # of parsing it on every call.
+    _system_prompt: ClassVar[str] = dedent(
+        re.split(r"SYSTEM:|USER:", prompt_template)[1]
+    ).strip()
 
-    @property
+    @functools.cached_property
     def content(self) -> str:
         return "\n\n".join(self.body)
 
+    def messages(self) -> list[ChatCompletionMessageParam]:
+        return [
+            {"role": "system", "content": self._system_prompt},
+            {"role": "user", "content": self.content},
+        ]
+
+
+# Replies keyed by a hash of the model, temperature, and prompt content. Threads
+# that quote the same earlier messages produce the same prompt, so near
+# deterministic calls can reuse the previous reply instead of calling OpenAI.
+_REPLY_CACHE_SIZE = 1024
+_reply_cache: dict[str, str] = {}
+
+
+async def handle_body(body: list[str]) -> str:
+    reply = Reply(body=body)
+    params = reply.call_params
+    if params.temperature is not None and params.temperature > 0.3:
+        return (await reply.call_async()).content
+
+    key = hashlib.sha256(
+        f"{params.model}\n{params.temperature}\n{reply.content}".encode()
+    ).hexdigest()
+    cached = _reply_cache.get(key)
+    if cached is not None:
+        return cached
+
+    content = (await reply.call_async()).content
+    if len(_reply_cache) >= _REPLY_CACHE_SIZE:
+        del _reply_cache[next(iter(_reply_cache))]
+    _reply_cache[key] = content
+    return content
+
+
+async def main() -> None:
+    gmail = Gmail(credentials_file="credentials.json", token_file="token.json")
+    mail = MiraMail(client=gmail)
 
-def handle_body(body: list[str]) -> str:
-    return Reply(body=body).call().content
+    # History is much cheaper than listing threads, so use it to check for new
+    # unread mail and only respond when something has arrived.
+    history_id = gmail.get_history_id()
+    await mail.respond_async(handle_body)
+    while True:
+        await asyncio.sleep(10)
+        print("Checking for new messages...")
+        history, history_id = await asyncio.to_thread(
+            gmail.get_history,
+            history_id,
+            history_types=["messageAdded"],
+            filter_label=label.UNREAD,
+        )
+        if history:
+            await mail.respond_async(handle_body)
 
 
-gmail = Gmail(credentials_file="credentials.json", token_file="token.json")
-mail = MiraMail(client=gmail)
-while True:
-    print("Checking for new messages...")
-    mail.respond(handle_body=handle_body)
-    time.sleep(10)
+asyncio.run(main())
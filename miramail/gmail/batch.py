@@ -0,0 +1,98 @@
+"""
+Sends Gmail API requests through the batch endpoint, retrying requests that were
+rate limited or hit a server error.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from googleapiclient.discovery import Resource
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+# Gmail accepts at most 100 calls in a single batch request.
+_BATCH_SIZE = 100
+
+# Statuses of sub-requests that are worth sending again after a pause.
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# How many times a request is sent before its error is returned, and the
+# initial pause between attempts, which doubles after each retry.
+_MAX_ATTEMPTS = 4
+_BACKOFF_SEC = 1.0
+
+
+def _is_retryable(error: Exception) -> bool:
+    return isinstance(error, HttpError) and error.resp.status in _RETRY_STATUSES
+
+
+def execute_batch(
+    service: Resource,
+    requests: list[HttpRequest],
+    pool: Optional[ThreadPoolExecutor] = None,
+) -> tuple[list[Optional[dict]], dict[int, Exception]]:
+    """
+    Executes requests using batched HTTP requests.
+
+    Requests are sent in batches of up to 100, on `pool` when one is given.
+    Requests that fail with a 429 or 5xx status are sent again with exponential
+    backoff. If a whole batch fails, its error is reported for each of its
+    requests.
+
+    Args:
+        service: The Gmail service object.
+        requests: The requests to execute.
+        pool: The pool to send the batches on. Default None, which sends them
+            one after another on the calling thread.
+
+    Returns:
+        The responses, in the same order as the requests, with None for failed
+        requests, and the errors of the failed requests by index.
+
+    """
+
+    responses: list[Optional[dict]] = [None] * len(requests)
+    errors: dict[int, Exception] = {}
+
+    def callback(request_id: str, response: dict, exception: HttpError) -> None:
+        index = int(request_id)
+        if exception is not None:
+            errors[index] = exception
+        else:
+            responses[index] = response
+            errors.pop(index, None)
+
+    def execute_chunk(indices: list[int]) -> None:
+        batch = service.new_batch_http_request(callback=callback)
+        for i in indices:
+            batch.add(requests[i], request_id=str(i))
+        try:
+            batch.execute()
+        except Exception as error:
+            for i in indices:
+                if responses[i] is None:
+                    errors[i] = error
+
+    pending = list(range(len(requests)))
+    for attempt in range(_MAX_ATTEMPTS):
+        if attempt:
+            backoff = _BACKOFF_SEC * 2 ** (attempt - 1)
+            time.sleep(backoff + random.uniform(0, backoff))
+
+        chunks = [
+            pending[start : start + _BATCH_SIZE]
+            for start in range(0, len(pending), _BATCH_SIZE)
+        ]
+        if pool is None or len(chunks) == 1:
+            for chunk in chunks:
+                execute_chunk(chunk)
+        else:
+            list(pool.map(execute_chunk, chunks))
+
+        pending = [i for i in pending if i in errors and _is_retryable(errors[i])]
+        if not pending:
+            break
+
+    return responses, errors
@@ -9,34 +9,148 @@
 # --------------------------------------------------------------------------------
 
 import base64
+import functools
 import html
-import math
+import io
 import mimetypes
+import mmap
 import os
 import re
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+from email import encoders
+from email.generator import BytesGenerator
 from email.mime.application import MIMEApplication
 from email.mime.audio import MIMEAudio
 from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Optional
+from email.utils import parsedate_to_datetime
+from typing import Callable, NamedTuple, Optional, Union, cast
 
 import dateutil.parser as parser
+from bs4 import BeautifulSoup
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import Resource, build
+from googleapiclient.discovery import Resource, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
 from simplegmail import Gmail as SimpleGmail
 
-from .attachment import Attachment
+from . import label
+from .attachment import Attachment, _urlsafe_b64decode
+from .batch import _BATCH_SIZE, execute_batch
 from .draft import Draft
 from .label import Label
 from .message import Message
 from .schemas import AttachmentMetadata
 from .thread import Thread
+from .transport import AuthorizedHttpx, JsonModel
+
+# Gmail limits concurrent requests per user, so only run a few batches at once.
+_MAX_CONCURRENT_BATCHES = 4
+
+# The largest page size the Gmail API allows when listing threads.
+_MAX_PAGE_SIZE = 500
+
+# The largest number of message ids `messages.batchModify` accepts per call.
+_MAX_BATCH_MODIFY_IDS = 1000
+
+# Labels rarely change, so a fetched label list is reused for this long.
+_LABELS_TTL_SEC = 60
+
+# The (lowercased) headers that are parsed into their own `Message` fields.
+_HEADER_KEYS = frozenset({"date", "from", "to", "subject", "cc", "bcc"})
+
+# Partial response masks limiting `get` responses to what `_build_message` reads.
+_MESSAGE_FIELDS = "id,threadId,labelIds,snippet,payload"
+_THREAD_FIELDS = f"id,messages({_MESSAGE_FIELDS})"
+
+# Extracts the address from a sender like "Name <name@example.com>".
+_SENDER_ADDRESS_RE = re.compile(r".+\s<(?P<addr>[^>]+@[^>]+\.[^>]+)>")
+
+
+# Message part types returned by `_evaluate_message_payload`.
+_PLAIN = 0
+_HTML = 1
+_ATTACHMENT = 2
+
+
+class _Part(NamedTuple):
+    part_type: int
+    body: str = ""
+    attachment_id: str = ""
+    filename: str = ""
+    filetype: str = ""
+    data: Optional[bytes] = None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date(value: str) -> str:
+    # Gmail serves RFC 2822 dates, which the email parser handles much faster
+    # than dateutil. Fall back to dateutil for anything else.
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        pass
+    else:
+        # A -0000 zone parses to a naive datetime, but still means UTC.
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return str(dt.astimezone())
+    try:
+        return str(parser.parse(value).astimezone())
+    except Exception:
+        return value
+
+
+@functools.lru_cache(maxsize=256)
+def _guess_type(path: str) -> tuple[Optional[str], Optional[str]]:
+    return mimetypes.guess_type(path)
+
+
+def _text_part(raw_data: bytes, sub_type: str) -> MIMEBase:
+    # Encode the UTF-8 bytes as they are instead of decoding them into a str
+    # that MIMEText would encode again.
+    attm = MIMEBase("text", sub_type, charset="utf-8")
+    attm.set_payload(raw_data)
+    encoders.encode_base64(attm)
+    return attm
+
+
+# MIME part constructors by main type, taking the raw data and the subtype.
+_MIME_CTORS: dict[str, Callable[[bytes, str], MIMEBase]] = {
+    "text": _text_part,
+    "image": lambda raw_data, sub_type: MIMEImage(raw_data, _subtype=sub_type),
+    "audio": lambda raw_data, sub_type: MIMEAudio(raw_data, _subtype=sub_type),
+    "application": lambda raw_data, sub_type: MIMEApplication(
+        raw_data, _subtype=sub_type
+    ),
+}
+
+
+def _mime_part(main_type: str, sub_type: str, raw_data: bytes) -> MIMEBase:
+    ctor = _MIME_CTORS.get(main_type)
+    if ctor is not None:
+        return ctor(raw_data, sub_type)
+
+    attm = MIMEBase(main_type, sub_type)
+    attm.set_payload(raw_data)
+    encoders.encode_base64(attm)
+    return attm
+
+
+def _attach_bytes(
+    msg: MIMEMultipart, main_type: str, sub_type: str, raw_data: bytes, filename: str
+) -> None:
+    attm = _mime_part(main_type, sub_type, raw_data)
+    attm.add_header("Content-Disposition", "attachment", filename=filename)
+    msg.attach(attm)
 
 
 class Gmail(SimpleGmail):
@@ -61,6 +175,8 @@ class Gmail(SimpleGmail):
     ]
     creds: Optional[Credentials] = None
     _service: Optional[Resource] = None
+    # The parsed discovery document, shared so each instance doesn't re-parse it.
+    _DISCOVERY_DOC: Optional[dict] = None
 
     # If you don't have a client secret file, follow the instructions at:
     # https://developers.google.com/gmail/api/quickstart/python
@@ -72,6 +188,12 @@ class Gmail(SimpleGmail):
         token_file: str = "token.json",
         _creds: Optional[Credentials] = None,
     ) -> None:
+        self._labels_cache: dict[str, tuple[float, dict[str, Label]]] = {}
+        self._labels_lock = threading.Lock()
+        self._signatures: dict[str, dict[str, str]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
         if _creds:
             self.creds = _creds
         elif os.path.exists(token_file):
@@ -91,7 +213,15 @@ class Gmail(SimpleGmail):
 
         try:
             # Call the Gmail API
-            self._service = build("gmail", "v1", credentials=self.creds)
+            json_model = JsonModel()
+            if Gmail._DISCOVERY_DOC is None:
+                Gmail._DISCOVERY_DOC = json_model.deserialize(
+                    get_static_doc("gmail", "v1")
+                )
+            self._http = AuthorizedHttpx(self.creds)
+            self._service = build_from_document(
+                Gmail._DISCOVERY_DOC, http=self._http, model=json_model
+            )
 
         except HttpError as error:
             # TODO(developer) - Handle errors from gmail API.
@@ -99,11 +229,247 @@ class Gmail(SimpleGmail):
 
     @property
     def service(self) -> Resource:
-        if self.creds and self.creds.expired:
-            self.creds.refresh(Request())
-
+        # The transport refreshes expired credentials before each request.
         return self._service
 
+    def close(self) -> None:
+        """Shuts down the worker threads and closes the HTTP connections."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+        self._http.close()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Gets the thread pool used to send batches, creating it on first use."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=_MAX_CONCURRENT_BATCHES,
+                    thread_name_prefix="gmail-batch",
+                )
+            return self._pool
+
+    def list_labels(self, user_id: str = "me") -> list[Label]:
+        """
+        Retrieves all labels for the specified user.
+
+        These Label objects are to be used with other functions like
+        modify_labels().
+
+        Args:
+            user_id: The user's email address. By default, the authenticated
+                user.
+
+        Returns:
+            The list of Label objects.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        try:
+            res = self.service.users().labels().list(userId=user_id).execute()
+
+        except HttpError as error:
+            # Pass along the error
+            raise error
+
+        else:
+            return [Label.parse(x) for x in res.get("labels", [])]
+
+    def create_label(self, name: str, user_id: str = "me") -> Label:
+        """
+        Creates a new label.
+
+        Args:
+            name: The display name of the new label.
+            user_id: The user's email address. By default, the authenticated
+                user.
+
+        Returns:
+            The created Label object.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        try:
+            res = (
+                self.service.users()
+                .labels()
+                .create(userId=user_id, body={"name": name})
+                .execute()
+            )
+
+        except HttpError as error:
+            # Pass along the error
+            raise error
+
+        else:
+            with self._labels_lock:
+                # The cached labels don't include the new one.
+                self._labels_cache.pop(user_id, None)
+            return Label.parse(res)
+
+    def _get_label_map(self, user_id: str, refresh: bool = False) -> dict[str, Label]:
+        """
+        Gets the user's labels keyed by id, reusing recently fetched labels.
+
+        Args:
+            user_id: The account the labels belong to.
+            refresh: Whether to fetch the labels even if they are cached.
+
+        Returns:
+            A dict of label id to Label.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        # Hold the lock while fetching so concurrent callers share one request.
+        with self._labels_lock:
+            cached = self._labels_cache.get(user_id)
+            if (
+                not refresh
+                and cached is not None
+                and time.monotonic() - cached[0] < _LABELS_TTL_SEC
+            ):
+                return cached[1]
+
+            label_map = {x.id: x for x in self.list_labels(user_id=user_id)}
+            self._labels_cache[user_id] = (time.monotonic(), label_map)
+            return label_map
+
+    def _get_label_map_for(
+        self, user_id: str, messages: list[dict]
+    ) -> dict[str, Label]:
+        """
+        Gets the user's labels keyed by id, making sure every label on the given
+        messages is included.
+
+        Args:
+            user_id: The account the labels belong to.
+            messages: The message objects returned from the Gmail API.
+
+        Returns:
+            A dict of label id to Label.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        label_map = self._get_label_map(user_id)
+        for message in messages:
+            if not label_map.keys() >= set(message.get("labelIds", ())):
+                # The label was created after the labels were cached.
+                return self._get_label_map(user_id, refresh=True)
+        return label_map
+
+    def _get_signature(self, send_as_email: str, user_id: str) -> str:
+        """
+        Gets the signature of a send-as address, listing the user's send-as
+        aliases once and reusing them afterwards.
+
+        Args:
+            send_as_email: The alias the signature is requested for (could be
+                the primary account).
+            user_id: The account the alias belongs to.
+
+        Returns:
+            The signature of the alias.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        signatures = self._signatures.get(user_id)
+        if signatures is None:
+            try:
+                res = (
+                    self.service.users()
+                    .settings()
+                    .sendAs()
+                    .list(userId=user_id)
+                    .execute()
+                )
+
+            except HttpError as error:
+                # Pass along the error
+                raise error
+
+            signatures = {
+                alias["sendAsEmail"].lower(): alias.get("signature", "")
+                for alias in res.get("sendAs", [])
+            }
+            self._signatures[user_id] = signatures
+
+        signature = signatures.get(send_as_email.lower())
+        if signature is None:
+            # Not a listed alias, so let the API report the error.
+            signature = self._get_alias_info(send_as_email, user_id)["signature"]
+        return signature
+
+    def _execute_batch(self, requests: list[HttpRequest]) -> list[dict]:
+        """
+        Executes requests using batched HTTP requests.
+
+        Requests are sent in batches of up to 100, with a few batches in flight
+        at once. Rate limited requests are retried with backoff.
+
+        Args:
+            requests: The requests to execute.
+
+        Returns:
+            The responses, in the same order as the requests.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        pool = self._get_pool() if len(requests) > _BATCH_SIZE else None
+        responses, errors = execute_batch(self.service, requests, pool)
+        if errors:
+            # Pass along the first error
+            raise errors[min(errors)]
+
+        return cast(list[dict], responses)
+
+    def _execute_batch_results(
+        self, requests: list[HttpRequest]
+    ) -> list[Union[dict, Exception]]:
+        """
+        Executes requests using batched HTTP requests, like `_execute_batch`,
+        but returns the error of each failed request instead of raising it.
+
+        Args:
+            requests: The requests to execute.
+
+        Returns:
+            The response, or the error, of each request, in the same order as
+            the requests.
+
+        """
+
+        pool = self._get_pool() if len(requests) > _BATCH_SIZE else None
+        responses, errors = execute_batch(self.service, requests, pool)
+        return [
+            errors[i] if response is None else response
+            for i, response in enumerate(responses)
+        ]
+
     def _get_threads_from_refs(
         self,
         user_id: str,
@@ -121,9 +487,8 @@ class Gmail(SimpleGmail):
                 information but does not download the data, and 'download'
                 which downloads the attachment data to store locally. Default
                 'reference'.
-            parallel: Whether to retrieve threads in parallel. Default true.
-                Currently parallelization is always on, since there is no
-                reason to do otherwise.
+            parallel: Whether to retrieve threads with batched requests rather
+                than one request per thread. Default true.
         Returns:
             A list of Thread objects.
         Raises:
@@ -140,38 +505,27 @@ class Gmail(SimpleGmail):
                 for ref in thread_refs
             ]
 
-        max_num_threads = 12  # empirically chosen, prevents throttling
-        target_thrds_per_thread = 10  # empirically chosen
-        num_threads = min(
-            math.ceil(len(thread_refs) / target_thrds_per_thread), max_num_threads
-        )
-        batch_size = math.ceil(len(thread_refs) / num_threads)
-        thread_lists: list[list[Thread]] = [[] for _ in range(num_threads)]
-
-        def thread_download_batch(thread_num: int) -> None:
-            gmail = Gmail(_creds=self.creds)
-
-            start = thread_num * batch_size
-            end = min(len(thread_refs), (thread_num + 1) * batch_size)
-            thread_lists[thread_num] = [
-                gmail._build_thread_from_ref(user_id, thread_refs[i], attachments)
-                for i in range(start, end)
+        threads = self.service.users().threads()
+        thread_jsons = self._execute_batch(
+            [
+                threads.get(userId=user_id, id=ref["id"], fields=_THREAD_FIELDS)
+                for ref in thread_refs
             ]
-
-            gmail.service.close()
-
-        threads = [
-            threading.Thread(target=thread_download_batch, args=(i,))
-            for i in range(num_threads)
+        )
+        label_map = self._get_label_map_for(
+            user_id, [m for thread in thread_jsons for m in thread.get("messages", [])]
+        )
+        threads_list = [
+            self._build_thread(
+                user_id, thread, attachments, label_map=label_map, download=False
+            )
+            for thread in thread_jsons
         ]
-
-        for t in threads:
-            t.start()
-
-        for t in threads:
-            t.join()
-
-        return sum(thread_lists, [])
+        if attachments == "download":
+            self._download_attachments(
+                [message for thread in threads_list for message in thread.messages]
+            )
+        return threads_list
 
     def _build_thread_from_ref(
         self, user_id: str, thread_ref: dict, attachments: str = "reference"
@@ -199,7 +553,7 @@ class Gmail(SimpleGmail):
             thread = (
                 self.service.users()
                 .threads()
-                .get(userId=user_id, id=thread_ref["id"])
+                .get(userId=user_id, id=thread_ref["id"], fields=_THREAD_FIELDS)
                 .execute()
             )
 
@@ -208,17 +562,59 @@ class Gmail(SimpleGmail):
             raise error
 
         else:
-            id = thread["id"]
-            # snippet = html.unescape(thread['snippet'])
-            snippet = ""
+            return self._build_thread(user_id, thread, attachments)
+
+    def _build_thread(
+        self,
+        user_id: str,
+        thread: dict,
+        attachments: str = "reference",
+        label_map: Optional[dict[str, Label]] = None,
+        download: bool = True,
+    ) -> Thread:
+        """
+        Creates a Thread object from the thread JSON returned by the Gmail API.
+
+        The thread JSON already contains the full messages, so no further
+        requests are needed to build them.
+
+        Args:
+            user_id: The username of the account the thread belongs to.
+            thread: The thread object returned from the Gmail API.
+            attachments: Accepted values are 'ignore' which completely ignores
+                all attachments, 'reference' which includes attachment
+                information but does not download the data, and 'download' which
+                downloads the attachment data to store locally. Default
+                'reference'.
+            label_map: The user's labels keyed by id. Default None, which gets
+                them from the label cache.
+            download: Whether to download the attachments here when
+                `attachments` is 'download'. Default true. Callers building
+                many threads pass false and download them all at once.
+        Returns:
+            The Thread object.
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+        """
 
-            message_refs = []
-            if "messages" in thread:  # ensure request was successful
-                message_refs.extend(thread["messages"])
+        id = thread["id"]
+        # snippet = html.unescape(thread['snippet'])
+        snippet = ""
 
-            messages = self._get_messages_from_refs(user_id, message_refs, attachments)
+        thread_messages = thread.get("messages", [])
+        if label_map is None:
+            label_map = self._get_label_map_for(user_id, thread_messages)
+        messages = [
+            self._build_message(
+                user_id, message, attachments, label_map=label_map, download=False
+            )
+            for message in thread_messages
+        ]
+        if download and attachments == "download":
+            self._download_attachments(messages)
 
-            return Thread(user_id=user_id, id=id, snippet=snippet, messages=messages)
+        return Thread(user_id=user_id, id=id, snippet=snippet, messages=messages)
 
     def _get_messages_from_refs(
         self,
@@ -238,9 +634,8 @@ class Gmail(SimpleGmail):
                 information but does not download the data, and 'download'
                 which downloads the attachment data to store locally. Default
                 'reference'.
-            parallel: Whether to retrieve messages in parallel. Default true.
-                Currently parallelization is always on, since there is no
-                reason to do otherwise.
+            parallel: Whether to retrieve messages with batched requests rather
+                than one request per message. Default true.
 
 
         Returns:
@@ -261,38 +656,42 @@ class Gmail(SimpleGmail):
                 for ref in message_refs
             ]
 
-        max_num_threads = 12  # empirically chosen, prevents throttling
-        target_msgs_per_thread = 10  # empirically chosen
-        num_threads = min(
-            math.ceil(len(message_refs) / target_msgs_per_thread), max_num_threads
-        )
-        batch_size = math.ceil(len(message_refs) / num_threads)
-        message_lists: list[list[Message]] = [[] for _ in range(num_threads)]
-
-        def thread_download_batch(thread_num: int) -> None:
-            gmail = Gmail(_creds=self.creds)
-
-            start = thread_num * batch_size
-            end = min(len(message_refs), (thread_num + 1) * batch_size)
-            message_lists[thread_num] = [
-                gmail._build_message_from_ref(user_id, message_refs[i], attachments)
-                for i in range(start, end)
+        messages = self.service.users().messages()
+        message_jsons = self._execute_batch(
+            [
+                messages.get(userId=user_id, id=ref["id"], fields=_MESSAGE_FIELDS)
+                for ref in message_refs
             ]
+        )
+        label_map = self._get_label_map_for(user_id, message_jsons)
+        messages_list = [
+            self._build_message(
+                user_id, message, attachments, label_map=label_map, download=False
+            )
+            for message in message_jsons
+        ]
+        if attachments == "download":
+            self._download_attachments(messages_list)
+        return messages_list
 
-            gmail.service.close()
+    @staticmethod
+    def _download_attachments(messages: list[Message]) -> None:
+        """
+        Downloads the attachments of several messages in as few batches as
+        possible.
 
-        threads = [
-            threading.Thread(target=thread_download_batch, args=(i,))
-            for i in range(num_threads)
-        ]
+        Args:
+            messages: The messages whose attachments to download.
 
-        for t in threads:
-            t.start()
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
 
-        for t in threads:
-            t.join()
+        """
 
-        return sum(message_lists, [])
+        Attachment.download_many(
+            [attm for message in messages for attm in message.attachments or []]
+        )
 
     def _build_draft_from_ref(
         self, user_id: str, draft_ref: dict, attachments: str = "reference"
@@ -335,7 +734,8 @@ class Gmail(SimpleGmail):
             message = self._build_message_from_ref(
                 user_id, draft["message"], attachments
             )
-            return Draft(user_id=user_id, id=id, message=message)
+            # The fields are built here, so skip validating them again.
+            return Draft.model_construct(user_id=user_id, id=id, message=message)
 
     def _ready_message_with_attachment(
         self, msg: MIMEMultipart, attachment: str
@@ -349,31 +749,23 @@ class Gmail(SimpleGmail):
 
         """
 
-        content_type, encoding = mimetypes.guess_type(attachment)
+        content_type, encoding = _guess_type(attachment)
 
         if content_type is None or encoding is not None:
             content_type = "application/octet-stream"
 
         main_type, sub_type = content_type.split("/", 1)
+        fname = os.path.basename(attachment)
         with open(attachment, "rb") as file:
-            raw_data = file.read()
-
-            attm: MIMEBase
-            if main_type == "text":
-                attm = MIMEText(raw_data.decode("UTF-8"), _subtype=sub_type)
-            elif main_type == "image":
-                attm = MIMEImage(raw_data, _subtype=sub_type)
-            elif main_type == "audio":
-                attm = MIMEAudio(raw_data, _subtype=sub_type)
-            elif main_type == "application":
-                attm = MIMEApplication(raw_data, _subtype=sub_type)
-            else:
-                attm = MIMEBase(main_type, sub_type)
-                attm.set_payload(raw_data)
+            # Encode straight from the page cache instead of reading the whole
+            # file into memory first. Empty files can't be mapped.
+            if not os.fstat(file.fileno()).st_size:
+                _attach_bytes(msg, main_type, sub_type, b"", fname)
+                return
 
-        fname = os.path.basename(attachment)
-        attm.add_header("Content-Disposition", "attachment", filename=fname)
-        msg.attach(attm)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # The MIME classes accept any bytes-like payload.
+                _attach_bytes(msg, main_type, sub_type, cast(bytes, mapped), fname)
 
     def _ready_message_with_attachment_metadatum(
         self, msg: MIMEMultipart, attachment_metadatum: AttachmentMetadata
@@ -390,27 +782,58 @@ class Gmail(SimpleGmail):
         content_type = attachment_metadatum.content_type
 
         main_type, sub_type = content_type.split("/", 1)
-        raw_data = attachment_metadatum.raw_data
-
-        attm: MIMEBase
-        if main_type == "text":
-            attm = MIMEText(raw_data.decode("UTF-8"), _subtype=sub_type)
-        elif main_type == "image":
-            attm = MIMEImage(raw_data, _subtype=sub_type)
-        elif main_type == "audio":
-            attm = MIMEAudio(raw_data, _subtype=sub_type)
-        elif main_type == "application":
-            attm = MIMEApplication(raw_data, _subtype=sub_type)
-        else:
-            attm = MIMEBase(main_type, sub_type)
-            attm.set_payload(raw_data)
-
-        attm.add_header(
-            "Content-Disposition",
-            "attachment",
-            filename=attachment_metadatum.file_name,
+        _attach_bytes(
+            msg,
+            main_type,
+            sub_type,
+            attachment_metadatum.raw_data,
+            attachment_metadatum.file_name,
         )
-        msg.attach(attm)
+
+    def _append_signature(
+        self, msg_html: Optional[str], sender: str, user_id: str
+    ) -> str:
+        """Appends the sender's account signature to the HTML body."""
+        m = _SENDER_ADDRESS_RE.match(sender)
+        address = m.group("addr") if m else sender
+        account_sig = self._get_signature(address, user_id)
+        return (msg_html or "") + "<br /><br />" + account_sig
+
+    def _create_simple_message(
+        self, msg_html: Optional[str], msg_plain: Optional[str]
+    ) -> MIMEMultipart:
+        """Creates a message with only plain and HTML bodies."""
+        msg = MIMEMultipart("alternative")
+        if msg_plain:
+            msg.attach(MIMEText(msg_plain, "plain"))
+        if msg_html:
+            msg.attach(MIMEText(msg_html, "html"))
+        return msg
+
+    def _create_message_with_attachments(
+        self,
+        msg_html: Optional[str],
+        msg_plain: Optional[str],
+        attachments: list[str | AttachmentMetadata],
+    ) -> MIMEMultipart:
+        """Creates a message with plain and HTML bodies followed by attachments."""
+        msg = MIMEMultipart("mixed")
+        attach_plain = MIMEMultipart("alternative")
+        attach_html = MIMEMultipart("related")
+
+        if msg_plain:
+            attach_plain.attach(MIMEText(msg_plain, "plain"))
+        if msg_html:
+            attach_html.attach(MIMEText(msg_html, "html"))
+
+        attach_plain.attach(attach_html)
+        msg.attach(attach_plain)
+        for attachment in attachments:
+            if isinstance(attachment, str):
+                self._ready_message_with_attachment(msg, attachment)
+            elif isinstance(attachment, AttachmentMetadata):
+                self._ready_message_with_attachment_metadatum(msg, attachment)
+        return msg
 
     def _create_message(
         self,
@@ -428,7 +851,16 @@ class Gmail(SimpleGmail):
         thread_id: str | None = None,
         user_id: str = "me",
     ) -> dict:
-        msg = MIMEMultipart("mixed" if attachments else "alternative")
+        if signature:
+            msg_html = self._append_signature(msg_html, sender, user_id)
+
+        if attachments:
+            msg = self._create_message_with_attachments(
+                msg_html, msg_plain, attachments
+            )
+        else:
+            msg = self._create_simple_message(msg_html, msg_plain)
+
         msg["To"] = to
         msg["From"] = sender
         msg["Subject"] = subject
@@ -445,34 +877,11 @@ class Gmail(SimpleGmail):
         if in_reply_to:
             msg["In-Reply-To"] = in_reply_to
 
-        if signature:
-            m = re.match(r".+\s<(?P<addr>.+@.+\..+)>", sender)
-            address = m.group("addr") if m else sender
-            account_sig = self._get_alias_info(address, user_id)["signature"]
-
-            if msg_html is None:
-                msg_html = ""
-
-            msg_html += "<br /><br />" + account_sig
-
-        attach_plain = MIMEMultipart("alternative") if attachments else msg
-        attach_html = MIMEMultipart("related") if attachments else msg
-
-        if msg_plain:
-            attach_plain.attach(MIMEText(msg_plain, "plain"))
-
-        if msg_html:
-            attach_html.attach(MIMEText(msg_html, "html"))
-
-        if attachments:
-            attach_plain.attach(attach_html)
-            msg.attach(attach_plain)
-            for attachment in attachments:
-                if isinstance(attachment, str):
-                    self._ready_message_with_attachment(msg, attachment)
-                elif isinstance(attachment, AttachmentMetadata):
-                    self._ready_message_with_attachment_metadatum(msg, attachment)
-        response = {"raw": base64.urlsafe_b64encode(msg.as_string().encode()).decode()}
+        # Flatten straight to bytes rather than building a str and encoding it.
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, mangle_from_=False).flatten(msg)
+        with buffer.getbuffer() as raw:
+            response = {"raw": base64.urlsafe_b64encode(raw).decode("ascii")}
 
         if thread_id:
             response["threadId"] = thread_id
@@ -509,7 +918,7 @@ class Gmail(SimpleGmail):
             message = (
                 self.service.users()
                 .messages()
-                .get(userId=user_id, id=message_ref["id"])
+                .get(userId=user_id, id=message_ref["id"], fields=_MESSAGE_FIELDS)
                 .execute()
             )
 
@@ -518,92 +927,197 @@ class Gmail(SimpleGmail):
             raise error
 
         else:
-            msg_id = message["id"]
-            thread_id = message["threadId"]
-            label_ids = []
-            if "labelIds" in message:
-                user_labels = {x.id: x for x in self.list_labels(user_id=user_id)}
-                label_ids = [user_labels[x] for x in message["labelIds"]]
-            snippet = html.unescape(message["snippet"])
-
-            payload = message["payload"]
-            headers = payload["headers"]
-
-            # Get header fields (date, from, to, subject)
-            date = ""
-            sender = ""
-            recipient = ""
-            subject = ""
-            msg_hdrs = {}
-            cc = []
-            bcc = []
-            for hdr in headers:
-                if hdr["name"].lower() == "date":
-                    try:
-                        date = str(parser.parse(hdr["value"]).astimezone())
-                    except Exception:
-                        date = hdr["value"]
-                elif hdr["name"].lower() == "from":
-                    sender = hdr["value"]
-                elif hdr["name"].lower() == "to":
-                    recipient = hdr["value"]
-                elif hdr["name"].lower() == "subject":
-                    subject = hdr["value"]
-                elif hdr["name"].lower() == "cc":
-                    cc = hdr["value"].split(", ")
-                elif hdr["name"].lower() == "bcc":
-                    bcc = hdr["value"].split(", ")
-
-                msg_hdrs[hdr["name"]] = hdr["value"]
-
-            parts = self._evaluate_message_payload(
-                payload, user_id, message_ref["id"], attachments
-            )
+            return self._build_message(user_id, message, attachments)
+
+    def _build_message(
+        self,
+        user_id: str,
+        message: dict,
+        attachments: str = "reference",
+        label_map: Optional[dict[str, Label]] = None,
+        download: bool = True,
+    ) -> Message:
+        """
+        Creates a Message object from the message JSON returned by the Gmail API.
+
+        Args:
+            user_id: The username of the account the message belongs to.
+            message: The full message object returned from the Gmail API.
+            attachments: Accepted values are 'ignore' which completely ignores
+                all attachments, 'reference' which includes attachment
+                information but does not download the data, and 'download' which
+                downloads the attachment data to store locally. Default
+                'reference'.
+            label_map: The user's labels keyed by id. Default None, which gets
+                them from the label cache.
+            download: Whether to download the attachments here when
+                `attachments` is 'download'. Default true. Callers building
+                many messages pass false and download them all at once.
+
+        Returns:
+            The Message object.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
 
-            plain_msg = None
-            html_msg = None
-            attms = []
-            for part in parts:
-                if part["part_type"] == "plain":
-                    if plain_msg is None:
-                        plain_msg = part["body"]
-                    else:
-                        plain_msg += "\n" + part["body"]
-                elif part["part_type"] == "html":
-                    if html_msg is None:
-                        html_msg = part["body"]
-                    else:
-                        html_msg += "<br/>" + part["body"]
-                elif part["part_type"] == "attachment":
-                    attm = Attachment(
+        msg_id = message["id"]
+        thread_id = message["threadId"]
+        label_ids = []
+        if "labelIds" in message:
+            if label_map is None:
+                label_map = self._get_label_map_for(user_id, [message])
+            label_ids = [label_map[x] for x in message["labelIds"]]
+        snippet = html.unescape(message["snippet"])
+
+        payload = message["payload"]
+        headers = payload["headers"]
+
+        # Get header fields (date, from, to, subject)
+        date = ""
+        sender = ""
+        recipient = ""
+        subject = ""
+        msg_hdrs = {}
+        cc = []
+        bcc = []
+        for hdr in headers:
+            name = hdr["name"]
+            value = hdr["value"]
+            msg_hdrs[name] = value
+
+            lower = name.lower()
+            if lower not in _HEADER_KEYS:
+                continue
+
+            match lower:
+                case "date":
+                    date = _parse_date(value)
+                case "from":
+                    sender = value
+                case "to":
+                    recipient = value
+                case "subject":
+                    subject = value
+                case "cc":
+                    cc = value.split(", ")
+                case "bcc":
+                    bcc = value.split(", ")
+
+        parts = self._evaluate_message_payload(payload, user_id, msg_id, attachments)
+
+        plain_parts = []
+        html_parts = []
+        attms = []
+        for part in parts:
+            part_type = part.part_type
+            if part_type == _PLAIN:
+                plain_parts.append(part.body)
+            elif part_type == _HTML:
+                html_parts.append(part.body)
+            else:
+                attms.append(
+                    Attachment(
                         service=self.service,
                         user_id=user_id,
                         msg_id=msg_id,
-                        id=part["attachment_id"],
-                        filename=part["filename"],
-                        filetype=part["filetype"],
-                        data=part["data"],
+                        id=part.attachment_id,
+                        filename=part.filename,
+                        filetype=part.filetype,
+                        data=part.data,
                     )
-                    attms.append(attm)
-            return Message(
-                service=self.service,
-                creds=self.creds,
-                user_id=user_id,
-                id=msg_id,
-                thread_id=thread_id,
-                recipient=recipient,
-                sender=sender,
-                subject=subject,
-                date=date,
-                snippet=snippet,
-                plain=plain_msg,
-                html=html_msg,
-                label_ids=[label.id for label in label_ids],
-                attachments=attms,
-                headers=msg_hdrs,
-                cc=cc,
-                bcc=bcc,
-            )
+                )
+        if download and attachments == "download":
+            Attachment.download_many(attms)
+
+        plain_msg = "\n".join(plain_parts) if plain_parts else None
+        html_msg = "<br/>".join(html_parts) if html_parts else None
+        return Message(
+            service=self.service,
+            user_id=user_id,
+            id=msg_id,
+            thread_id=thread_id,
+            recipient=recipient,
+            sender=sender,
+            subject=subject,
+            date=date,
+            snippet=snippet,
+            plain=plain_msg,
+            html=html_msg,
+            label_ids=[label.id for label in label_ids],
+            attachments=attms,
+            headers=msg_hdrs,
+            cc=cc,
+            bcc=bcc,
+        )
+
+    def _evaluate_message_payload(
+        self,
+        payload: dict,
+        user_id: str,
+        msg_id: str,
+        attachments: str = "reference",
+    ) -> list[_Part]:
+        """
+        Recursively evaluates a message payload.
+
+        Attachments that have to be fetched separately are returned without
+        data, which `_build_message` then downloads in a batch.
+
+        Args:
+            payload: The message payload object (response from Gmail API).
+            user_id: The current account address (default 'me').
+            msg_id: The id of the message.
+            attachments: Accepted values are 'ignore' which completely ignores
+                all attachments, 'reference' which includes attachment
+                information but does not download the data, and 'download' which
+                downloads the attachment data to store locally. Default
+                'reference'.
+
+        Returns:
+            A list of message parts.
+
+        """
+
+        body = payload["body"]
+        mime_type = payload["mimeType"]
+        if "attachmentId" in body:  # if it's an attachment
+            if attachments == "ignore":
+                return []
+
+            data = None
+            if attachments == "download" and "data" in body:
+                data = _urlsafe_b64decode(body["data"])
+            return [
+                _Part(
+                    _ATTACHMENT,
+                    attachment_id=body["attachmentId"],
+                    filename=payload["filename"] or "unknown",
+                    filetype=mime_type,
+                    data=data,
+                )
+            ]
+
+        elif mime_type == "text/html":
+            data = _urlsafe_b64decode(body["data"])
+            html_body = BeautifulSoup(data, "lxml", from_encoding="utf-8").body
+            return [_Part(_HTML, body=str(html_body))]
+
+        elif mime_type == "text/plain":
+            data = _urlsafe_b64decode(body["data"])
+            return [_Part(_PLAIN, body=data.decode("UTF-8"))]
+
+        elif mime_type.startswith("multipart"):
+            ret = []
+            for part in payload.get("parts", []):
+                ret.extend(
+                    self._evaluate_message_payload(part, user_id, msg_id, attachments)
+                )
+            return ret
+
+        return []
 
     def send_message(
         self,
@@ -721,6 +1235,80 @@ class Gmail(SimpleGmail):
             # Pass along the error
             raise error
 
+    def send_messages(
+        self, messages: list[dict], user_id: str = "me"
+    ) -> list[Union[dict, Exception]]:
+        """
+        Sends several emails using batched requests.
+
+        Unlike `send_message`, the sent messages are not fetched again, so only
+        their references are returned. A failed send doesn't stop the others, so
+        its error is returned in place of its reference instead of being raised.
+
+        Args:
+            messages: The messages to send, each a dict of the keyword arguments
+                accepted by `send_message`.
+            user_id: The address of the sending account, for messages that
+                don't set their own. 'me' for the default address associated
+                with the account.
+
+        Returns:
+            The references to the sent messages, with keys id, threadId, and
+            labelIds, or the error for each message that could not be sent, in
+            the same order as `messages`.
+
+        """
+
+        send = self.service.users().messages().send
+        return self._execute_batch_results(
+            [
+                send(
+                    userId="me",
+                    body=self._create_message(**{"user_id": user_id, **message}),
+                )
+                for message in messages
+            ]
+        )
+
+    def create_drafts(
+        self, messages: list[dict], user_id: str = "me"
+    ) -> list[Union[dict, Exception]]:
+        """
+        Creates several drafts using batched requests.
+
+        Unlike `create_draft`, the drafts are not fetched again, so only their
+        references are returned. A failed draft doesn't stop the others, so its
+        error is returned in place of its reference instead of being raised.
+
+        Args:
+            messages: The drafts to create, each a dict of the keyword arguments
+                accepted by `create_draft`.
+            user_id: The address of the sending account, for drafts that don't
+                set their own. 'me' for the default address associated with the
+                account.
+
+        Returns:
+            The references to the created drafts, with keys id and message, or
+            the error for each draft that could not be created, in the same
+            order as `messages`.
+
+        """
+
+        create = self.service.users().drafts().create
+        return self._execute_batch_results(
+            [
+                create(
+                    userId="me",
+                    body={
+                        "message": self._create_message(
+                            **{"user_id": user_id, **message}
+                        )
+                    },
+                )
+                for message in messages
+            ]
+        )
+
     def get_threads(
         self,
         user_id: str = "me",
@@ -753,42 +1341,187 @@ class Gmail(SimpleGmail):
             labels = []
 
         label_ids = [label.id for label in labels]
+        threads = self.service.users().threads()
+
+        def list_page(page_token: Optional[str]) -> dict:
+            return threads.list(
+                userId=user_id,
+                q=query,
+                labelIds=label_ids,
+                includeSpamTrash=include_spam_trash,
+                maxResults=_MAX_PAGE_SIZE,
+                pageToken=page_token,
+            ).execute()
 
         try:
-            response = (
-                self.service.users()
-                .threads()
-                .list(
-                    userId=user_id,
-                    q=query,
-                    labelIds=label_ids,
-                    includeSpamTrash=include_spam_trash,
+            response = list_page(None)
+
+            result = []
+            while True:
+                # Fetch the next page while this page's threads are retrieved.
+                next_page = None
+                if "nextPageToken" in response:
+                    next_page = self._get_pool().submit(
+                        list_page, response["nextPageToken"]
+                    )
+
+                result.extend(
+                    self._get_threads_from_refs(
+                        user_id, response.get("threads", []), attachments
+                    )
                 )
-                .execute()
-            )
 
-            thread_refs = []
-            if "threads" in response:  # ensure request was successful
-                thread_refs.extend(response["threads"])
+                if next_page is None:
+                    return result
+                response = next_page.result()
 
-            while "nextPageToken" in response:
-                page_token = response["nextPageToken"]
-                response = (
-                    self.service.users()
-                    .threads()
-                    .list(
+        except HttpError as error:
+            # Pass along the error
+            raise error
+
+    def modify_labels(
+        self,
+        messages: list[Message],
+        to_add: Union[list[Label], list[str], None] = None,
+        to_remove: Union[list[Label], list[str], None] = None,
+    ) -> None:
+        """
+        Adds and removes labels on several messages with `batchModify` requests.
+
+        Each message's `label_ids` is updated to match.
+
+        Args:
+            messages: The messages to modify.
+            to_add: The labels to add. Default None, which adds none.
+            to_remove: The labels to remove. Default None, which removes none.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        add_ids = label.intern_ids(
+            [lbl.id if isinstance(lbl, Label) else lbl for lbl in to_add or []]
+        )
+        remove_ids = label.intern_ids(
+            [lbl.id if isinstance(lbl, Label) else lbl for lbl in to_remove or []]
+        )
+        if not messages or not (add_ids or remove_ids):
+            return
+
+        by_user: dict[str, list[Message]] = {}
+        for message in messages:
+            by_user.setdefault(message.user_id, []).append(message)
+
+        try:
+            for user_id, user_messages in by_user.items():
+                for start in range(0, len(user_messages), _MAX_BATCH_MODIFY_IDS):
+                    chunk = user_messages[start : start + _MAX_BATCH_MODIFY_IDS]
+                    self.service.users().messages().batchModify(
                         userId=user_id,
-                        q=query,
-                        labelIds=label_ids,
-                        includeSpamTrash=include_spam_trash,
-                        pageToken=page_token,
-                    )
-                    .execute()
-                )
+                        body={
+                            "ids": [message.id for message in chunk],
+                            "addLabelIds": add_ids,
+                            "removeLabelIds": remove_ids,
+                        },
+                    ).execute()
 
-                thread_refs.extend(response["threads"])
+        except HttpError as error:
+            # Pass along the error
+            raise error
+
+        # batchModify returns no body, so update the labels locally.
+        removed = frozenset(remove_ids)
+        for message in messages:
+            label_ids = [x for x in message.label_ids or [] if x not in removed]
+            present = set(label_ids)
+            label_ids.extend(x for x in add_ids if x not in present)
+            message.label_ids = label_ids
+
+    def mark_as_read(self, messages: list[Message]) -> None:
+        """
+        Marks several messages as read (by removing the UNREAD label).
+
+        Args:
+            messages: The messages to mark as read.
+
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+
+        """
+
+        self.modify_labels(messages, to_remove=[label.UNREAD])
+
+    def get_history_id(self, user_id: str = "me") -> str:
+        """
+        Gets the current history id of the mailbox.
+
+        Args:
+            user_id: the user's email address. Default 'me', the authenticated
+                user.
+        Returns:
+            The history id to pass to `get_history`.
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+        """
+
+        try:
+            profile = self.service.users().getProfile(userId=user_id).execute()
+
+        except HttpError as error:
+            # Pass along the error
+            raise error
+
+        else:
+            return profile["historyId"]
+
+    def get_history(
+        self,
+        start_history_id: str,
+        user_id: str = "me",
+        history_types: Optional[list[str]] = None,
+        filter_label: Optional[Label] = None,
+    ) -> tuple[list[dict], str]:
+        """
+        Gets the changes to the mailbox since a history id.
+
+        This is much cheaper than listing messages or threads again, so it is
+        useful for checking whether anything has changed before doing so.
+        Args:
+            start_history_id: the history id to return changes after.
+            user_id: the user's email address. Default 'me', the authenticated
+                user.
+            history_types: the types of changes to return, e.g.
+                'messageAdded'. Default None, which returns all types.
+            filter_label: only return changes to messages with this label.
+        Returns:
+            The history records and the latest history id of the mailbox.
+        Raises:
+            googleapiclient.errors.HttpError: There was an error executing the
+                HTTP request.
+        """
+
+        params: dict = {"userId": user_id, "startHistoryId": start_history_id}
+        if history_types:
+            params["historyTypes"] = history_types
+        if filter_label is not None:
+            params["labelId"] = filter_label.id
+
+        try:
+            history = self.service.users().history()
+            response = history.list(**params).execute()
+            records = response.get("history", [])
+
+            while "nextPageToken" in response:
+                response = history.list(
+                    **params, pageToken=response["nextPageToken"]
+                ).execute()
+                records.extend(response.get("history", []))
 
-            return self._get_threads_from_refs(user_id, thread_refs, attachments)
+            return records, response["historyId"]
 
         except HttpError as error:
             # Pass along the error
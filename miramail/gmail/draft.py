@@ -8,7 +8,7 @@
 # Note that the code below is modified slightly from the original source.
 # --------------------------------------------------------------------------------
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from .message import Message
 
@@ -17,16 +17,18 @@ class Draft(BaseModel):
     """
     The Draft class for drafts in your Gmail mailbox. This class should not
     be manually constructed. Contains all information about the associated
-    draft.
+    draft. Drafts are immutable.
 
     """
 
+    model_config = ConfigDict(frozen=True, extra="ignore", arbitrary_types_allowed=True)
+
     user_id: str = Field(
-        default_factory=str,
+        default="",
         description="The username of the account the message belongs to.",
     )
     id: str = Field(
-        default_factory=str,
+        default="",
         description="The draft id.",
     )
     message: Message = Field(
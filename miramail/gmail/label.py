@@ -9,12 +9,23 @@
 # --------------------------------------------------------------------------------
 
 
-from typing import Literal, Optional
+import sys
+from dataclasses import dataclass
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import TypeAdapter
 
 
-class Label(BaseModel):
+# The API's labelListVisibility values and their `Label` field values.
+_LABEL_LIST_VISIBILITY: dict[Any, str] = {
+    "labelShow": "label_show",
+    "labelHide": "label_hide",
+    "labelShowIfUnread": "label_show_if_unread",
+}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Label:
     """
     A Gmail label object.
 
@@ -26,28 +37,52 @@ class Label(BaseModel):
         id: The ID of the label.
 
     Attributes:
-        name (str): The name of the Label.
         id (str): The ID of the label.
+        name (str): The name of the Label.
+        message_list_visibility (Optional[str]): The visibility of messages with
+            this label in the message list in the Gmail web interface.
+        label_list_visibility (Optional[str]): The visibility of this label in
+            the label list in the Gmail web interface.
+        type (Optional[str]): The type of the label.
 
     """
 
-    id: str = Field(description="The ID of the label.")
-    name: str = Field(description="The name of the Label.")
-    message_list_visibility: Optional[Literal["show", "hide"]] = Field(
-        description="The visibility of messages with this label in the message list in \
-                     the Gmail web interface.",
-        default=None,
-    )
+    id: str
+    name: str
+    message_list_visibility: Optional[Literal["show", "hide"]] = None
     label_list_visibility: Optional[
         Literal["label_show", "label_hide", "label_show_if_unread"]
-    ] = Field(
-        description="The visibility of this label in the label list in the Gmail web \
-                     interface.",
-        default=None,
-    )
-    type: Optional[Literal["system", "user"]] = Field(
-        description="The type of the label.", default=None
-    )
+    ] = None
+    type: Optional[Literal["system", "user"]] = None
+
+    @classmethod
+    def parse(cls, data: dict[str, Any]) -> "Label":
+        """
+        Creates a validated Label from a label object returned by the Gmail API.
+
+        Args:
+            data: The label object, with camelCase keys.
+
+        Returns:
+            The Label object.
+
+        Raises:
+            pydantic.ValidationError: The label object is invalid.
+
+        """
+
+        label_list_visibility = data.get("labelListVisibility")
+        return _LABEL_ADAPTER.validate_python(
+            {
+                "id": data["id"],
+                "name": data["name"],
+                "message_list_visibility": data.get("messageListVisibility"),
+                "label_list_visibility": _LABEL_LIST_VISIBILITY.get(
+                    label_list_visibility, label_list_visibility
+                ),
+                "type": data.get("type"),
+            }
+        )
 
     def __repr__(self) -> str:
         return f"Label(name={self.name!r}, id={self.id!r})"
@@ -60,14 +95,18 @@ class Label(BaseModel):
 
     def __eq__(self, other) -> bool:
         if isinstance(other, str):
-            # Can be compared to a string of the label ID
-            return self.id == other
+            # Can be compared to a string of the label ID. Interned ids are
+            # usually the same object, which skips comparing characters.
+            return self.id is other or self.id == other
         elif isinstance(other, Label):
             return self.id == other.id
         else:
             return False
 
 
+_LABEL_ADAPTER = TypeAdapter(Label)
+
+
 INBOX = Label(id="INBOX", name="INBOX")
 SPAM = Label(id="SPAM", name="SPAM")
 TRASH = Label(id="TRASH", name="TRASH")
@@ -81,3 +120,36 @@ SOCIAL = Label(id="CATEGORY_SOCIAL", name="CATEGORY_SOCIAL")
 PROMOTIONS = Label(id="CATEGORY_PROMOTIONS", name="CATEGORY_PROMOTIONS")
 UPDATES = Label(id="CATEGORY_UPDATES", name="CATEGORY_UPDATES")
 FORUMS = Label(id="CATEGORY_FORUMS", name="CATEGORY_FORUMS")
+
+# The canonical copy of each label id seen, so equal ids share one string.
+_KNOWN_IDS: dict[str, str] = {
+    lbl.id: lbl.id
+    for lbl in (
+        INBOX,
+        SPAM,
+        TRASH,
+        UNREAD,
+        STARRED,
+        SENT,
+        IMPORTANT,
+        DRAFT,
+        PERSONAL,
+        SOCIAL,
+        PROMOTIONS,
+        UPDATES,
+        FORUMS,
+    )
+}
+
+
+def intern_id(label_id: str) -> str:
+    """Returns the canonical copy of a label id."""
+    canonical = _KNOWN_IDS.get(label_id)
+    if canonical is None:
+        canonical = _KNOWN_IDS.setdefault(label_id, sys.intern(label_id))
+    return canonical
+
+
+def intern_ids(label_ids: list[str]) -> list[str]:
+    """Returns the label ids with each replaced by its canonical copy."""
+    return [intern_id(label_id) for label_id in label_ids]
@@ -8,68 +8,68 @@
 # Note that the code below is modified from the original source.
 # --------------------------------------------------------------------------------
 
+import functools
+from dataclasses import dataclass
 from typing import List, Optional, Union
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import Resource
 from googleapiclient.errors import HttpError
-from pydantic import BaseModel, ConfigDict, Field
 
 from . import label
 from .attachment import Attachment
 from .label import Label
 
 
-class Message(BaseModel):
+# One is built for every fetched message, so skip validation and instance dicts.
+@dataclass(slots=True, kw_only=True)
+class Message:
     """
     The Message class for emails in your Gmail mailbox. This class should not
     be manually constructed. Contains all information about the associated
     message, and can be used to modify the message's labels (e.g., marking as
     read/unread, archiving, moving to trash, starring, etc.).
+
+    Attributes:
+        service: The Gmail service object.
+        user_id: The username of the account the message belongs to.
+        id: The message id.
+        thread_id: The thread id of the message.
+        recipient: Who the message was addressed to.
+        sender: Who the message was sent from.
+        subject: The subject line of the message.
+        date: The date the message was sent.
+        snippet: The snippet line for the message.
+        plain: The plaintext contents of the message.
+        html: The HTML contents of the message.
+        label_ids: The ids of labels associated with this message.
+        attachments: A list of attachments for the message.
+        headers: A dict of header values.
+        cc: Who the message was cc'd on the message.
+        bcc: Who the message was bcc'd on the message.
+
     """
 
-    service: "Resource" = Field(
-        description="The Gmail service object.",
-    )
-    creds: Credentials = Field(description="The credentials for the account.")
-    user_id: str = Field(
-        description="The username of the account the message belongs to"
-    )
-    id: str = Field(description="The message id.")
-    thread_id: str = Field(description="The thread id of the message.")
-    recipient: str = Field(description="Who the message was addressed to.")
-    sender: str = Field(description="Who the message was sent from.")
-    subject: str = Field(description="The subject line of the message.")
-    date: str = Field(description="The date the message was sent.")
-    snippet: str = Field(description="The snippet line for the message.")
-    plain: Optional[str] = Field(
-        description="The plaintext contents of the message.", default=None
-    )
-    html: Optional[str] = Field(
-        description="The HTML contents of the message.", default=None
-    )
-    label_ids: Optional[list[str]] = Field(
-        description="The ids of labels associated with this message.", default=None
-    )
-    attachments: Optional[list[Attachment]] = Field(
-        description="A list of attachments for the message.", default=None
-    )
-    headers: dict = Field(description="A dict of header values.")
-    cc: Optional[list[str]] = Field(
-        description="Who the message was cc'd on the message.", default=None
-    )
-    bcc: Optional[list[str]] = Field(
-        description="Who the message was bcc'd on the message.", default=None
-    )
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-
-    @property
-    def _service(self) -> Resource:
-        if self.creds.expired:
-            self.creds.refresh(Request())
-
-        return self.service
+    service: "Resource"
+    user_id: str
+    id: str
+    thread_id: str
+    recipient: str
+    sender: str
+    subject: str
+    date: str
+    snippet: str
+    plain: Optional[str] = None
+    html: Optional[str] = None
+    label_ids: Optional[list[str]] = None
+    attachments: Optional[list[Attachment]] = None
+    headers: dict
+    cc: Optional[list[str]] = None
+    bcc: Optional[list[str]] = None
+
+    def __post_init__(self) -> None:
+        # Thousands of messages share the same few label ids.
+        if self.label_ids is not None:
+            self.label_ids = label.intern_ids(self.label_ids)
 
     def __repr__(self) -> str:
         """Represents the object by its sender, recipient, and id."""
@@ -204,7 +204,7 @@ class Message(BaseModel):
 
         try:
             res = (
-                self._service.users()
+                self.service.users()
                 .messages()
                 .trash(
                     userId=self.user_id,
@@ -219,10 +219,10 @@ class Message(BaseModel):
 
         else:
             assert (
-                label.TRASH in res["labelIds"]
+                label.TRASH.id in res["labelIds"]
             ), "An error occurred in a call to `trash`."
 
-            self.label_ids = res["labelIds"]
+            self.label_ids = label.intern_ids(res["labelIds"])
 
     def untrash(self) -> None:
         """
@@ -236,7 +236,7 @@ class Message(BaseModel):
 
         try:
             res = (
-                self._service.users()
+                self.service.users()
                 .messages()
                 .untrash(
                     userId=self.user_id,
@@ -251,10 +251,10 @@ class Message(BaseModel):
 
         else:
             assert (
-                label.TRASH not in res["labelIds"]
+                label.TRASH.id not in res["labelIds"]
             ), "An error occurred in a call to `untrash`."
 
-            self.label_ids = res["labelIds"]
+            self.label_ids = label.intern_ids(res["labelIds"])
 
     def move_from_inbox(self, to: Union[Label, str]) -> None:
         """
@@ -348,27 +348,19 @@ class Message(BaseModel):
                 HTTP request.
 
         """
-        list_add: Union[List[Label], List[str]] = []
-        list_remove: Union[List[Label], List[str]] = []
-
-        if isinstance(to_add, Label):
-            list_add = [to_add]
-        elif isinstance(to_add, str):  # make mypy happy
-            list_add = [to_add]
-
-        if isinstance(to_remove, Label):
-            list_remove = [to_remove]
-        elif isinstance(to_remove, str):  # make mypy happy
-            list_remove = [to_remove]
+        add_ids = _norm(to_add)
+        remove_ids = _norm(to_remove)
+        if not add_ids and not remove_ids:
+            return
 
         try:
             res = (
-                self._service.users()
+                self.service.users()
                 .messages()
                 .modify(
                     userId=self.user_id,
                     id=self.id,
-                    body=self._create_update_labels(list_add, list_remove),
+                    body=self._create_update_labels(add_ids, remove_ids),
                 )
                 .execute()
             )
@@ -378,40 +370,44 @@ class Message(BaseModel):
             raise error
 
         else:
-            assert all([lbl in res["labelIds"] for lbl in to_add]) and all(
-                [lbl not in res["labelIds"] for lbl in to_remove]
+            got = set(res["labelIds"])
+            assert got.issuperset(add_ids) and got.isdisjoint(
+                remove_ids
             ), "An error occurred while modifying message label."
 
-            self.label_ids = res["labelIds"]
+            self.label_ids = label.intern_ids(res["labelIds"])
 
     def _create_update_labels(
         self,
-        to_add: Optional[Union[List[Label], List[str]]] = None,
-        to_remove: Optional[Union[List[Label], List[str]]] = None,
+        to_add: Optional[List[str]] = None,
+        to_remove: Optional[List[str]] = None,
     ) -> dict:
         """
         Creates an object for updating message label.
 
         Args:
-            to_add: A list of labels to add.
-            to_remove: A list of labels to remove.
+            to_add: A list of label ids to add.
+            to_remove: A list of label ids to remove.
 
         Returns:
             The modify labels object to pass to the Gmail API.
 
         """
 
-        if to_add is None:
-            to_add = []
+        return _update_labels_body(tuple(to_add or ()), tuple(to_remove or ()))
+
+
+def _norm(labels: Union[Label, str, List[Label], List[str]]) -> List[str]:
+    # Label ids are plain strings, so a single check tells the two apart.
+    if isinstance(labels, str):
+        return [labels]
+    if isinstance(labels, Label):
+        return [labels.id]
+    return [lbl if isinstance(lbl, str) else lbl.id for lbl in labels]
 
-        if to_remove is None:
-            to_remove = []
 
-        return {
-            "addLabelIds": [
-                lbl.id if isinstance(lbl, Label) else lbl for lbl in to_add
-            ],
-            "removeLabelIds": [
-                lbl.id if isinstance(lbl, Label) else lbl for lbl in to_remove
-            ],
-        }
+@functools.lru_cache(maxsize=256)
+def _update_labels_body(add_ids: tuple[str, ...], remove_ids: tuple[str, ...]) -> dict:
+    # Most updates are one of a few single-label changes, so the bodies are
+    # shared. They are only ever serialized, never modified.
+    return {"addLabelIds": list(add_ids), "removeLabelIds": list(remove_ids)}
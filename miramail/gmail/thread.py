@@ -8,7 +8,7 @@
 # Note that the code below is modified slightly from the original source.
 # --------------------------------------------------------------------------------
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from .message import Message
 
@@ -20,6 +20,8 @@ class Thread(BaseModel):
     thread.
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     user_id: str = Field(
         default_factory=str,
         description="The username of the account the thread belongs to.",
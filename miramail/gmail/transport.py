@@ -0,0 +1,153 @@
+"""
+An HTTP transport and JSON model for `googleapiclient` backed by `httpx` and, when
+installed, `orjson`.
+"""
+
+import datetime
+import importlib.util
+import json
+import threading
+from typing import Any, Optional, Union
+
+import httplib2
+import httpx
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient import model
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _JSONDecodeError: type[ValueError] = orjson.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+# HTTP/2 support in httpx requires the optional `h2` package.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Matches `googleapiclient.http.DEFAULT_HTTP_TIMEOUT_SEC`.
+_TIMEOUT_SEC = 60
+
+# Enough connections for the batch and attachment workers when HTTP/2 isn't
+# available, kept alive across polls a few seconds apart.
+_LIMITS = httpx.Limits(
+    max_connections=16, max_keepalive_connections=16, keepalive_expiry=30
+)
+
+# Refresh ahead of expiry so long-running polls never send a stale token.
+_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+
+class AuthorizedHttpx:
+    """
+    An httplib2-compatible HTTP object that sends authorized requests through an
+    `httpx.Client`.
+
+    `googleapiclient` only needs `request()` to return an `httplib2.Response` and
+    the body, so this can be passed as `http` when building a service. Unlike
+    `httplib2.Http`, the underlying client pools connections, is safe to share
+    between threads, and multiplexes requests over HTTP/2 when `h2` is installed.
+
+    Args:
+        credentials: The credentials used to authorize each request.
+        client: A custom `httpx.Client`. Default None, which creates one.
+
+    Attributes:
+        credentials (Credentials): The credentials used to authorize each request.
+
+    """
+
+    def __init__(
+        self, credentials: Credentials, client: Optional[httpx.Client] = None
+    ) -> None:
+        self.credentials = credentials
+        self._client = client or httpx.Client(
+            http2=_HTTP2, follow_redirects=True, timeout=_TIMEOUT_SEC, limits=_LIMITS
+        )
+        self._auth_request = Request()
+        self._auth_lock = threading.Lock()
+
+    def request(
+        self,
+        uri: str,
+        method: str = "GET",
+        body: Union[str, bytes, None] = None,
+        headers: Optional[dict] = None,
+        redirections: int = httplib2.DEFAULT_MAX_REDIRECTS,
+        connection_type: object = None,
+    ) -> tuple[httplib2.Response, bytes]:
+        """
+        Sends an authorized request, refreshing the credentials when they are about
+        to expire and once more on a 401.
+
+        Args:
+            uri: The URI to request.
+            method: The HTTP method.
+            body: The request body.
+            headers: The request headers.
+            redirections: Unused, accepted for httplib2 compatibility.
+            connection_type: Unused, accepted for httplib2 compatibility.
+
+        Returns:
+            The response and its content.
+
+        """
+
+        headers = dict(headers or {})
+        with self._auth_lock:
+            if self._expires_soon():
+                self.credentials.refresh(self._auth_request)
+            self.credentials.before_request(self._auth_request, method, uri, headers)
+        response = self._client.request(method, uri, content=body, headers=headers)
+
+        if response.status_code == 401:
+            with self._auth_lock:
+                self.credentials.refresh(self._auth_request)
+                self.credentials.apply(headers)
+            response = self._client.request(method, uri, content=body, headers=headers)
+
+        return self._to_httplib2(response), response.content
+
+    def close(self) -> None:
+        """Closes the underlying connections."""
+        self._client.close()
+
+    def _expires_soon(self) -> bool:
+        expiry = self.credentials.expiry
+        if expiry is None or not self.credentials.refresh_token:
+            return False
+        # google-auth stores expiry as a naive UTC datetime.
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return expiry - now < _REFRESH_MARGIN
+
+    @staticmethod
+    def _to_httplib2(response: httpx.Response) -> httplib2.Response:
+        info = {"status": str(response.status_code)}
+        for key, value in response.headers.items():
+            # httpx already decoded the content.
+            if key != "content-encoding":
+                info[key] = value
+        resp = httplib2.Response(info)
+        resp.reason = response.reason_phrase
+        return resp
+
+
+class JsonModel(model.JsonModel):
+    """
+    A `googleapiclient` JSON model that parses responses with `orjson` when it is
+    installed, falling back to `json` otherwise.
+
+    Every response body, including each part of a batch response, goes through
+    `deserialize`, so this can be passed as `model` when building a service.
+    """
+
+    def deserialize(self, content: Union[str, bytes]) -> Any:
+        try:
+            body = _loads(content)
+        except _JSONDecodeError:
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
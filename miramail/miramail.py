@@ -2,7 +2,9 @@
 MiraMail is a convenience library for Mirascope with an email interface.
 """
 
-from typing import Callable, Literal
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Literal, Sequence, Union
 
 from pydantic import BaseModel, ConfigDict
 
@@ -11,6 +13,9 @@ from .gmail.client import Gmail
 from .gmail.message import Message
 from .gmail.thread import Thread
 
+# The number of prompt calls to run at once.
+_MAX_CONCURRENT_CALLS = 8
+
 
 class MiraMail(BaseModel):
     client: Gmail
@@ -23,68 +28,153 @@ class MiraMail(BaseModel):
     def respond(self, handle_body: Callable[[list[str]], str]):
         """
         Responds to the threads with a Mirascope prompt.
+
+        `handle_body` is called for several threads at once, so it must be safe
+        to call from multiple threads. If it raises for some threads, the others
+        are still replied to before the first error is raised.
         """
-        threads = self.client.get_threads(labels=[label.UNREAD])
-        for thread in threads:
-            messages = thread.messages
-            if len(messages) < 1:
-                continue
-            self._handle_thread(thread, handle_body)
+        threads = self._get_unread_threads()
 
-    def _handle_thread(self, thread: Thread, handle_body: Callable[[list[str]], str]):
-        """Handles a thread.
+        # The prompt calls are I/O bound, so run a few at a time.
+        with ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_CALLS) as pool:
+            futures = [
+                pool.submit(handle_body, self._get_body(thread)) for thread in threads
+            ]
+            results = [future.exception() or future.result() for future in futures]
 
-        Args:
-            thread: The thread to handle.
+        self._reply_to_handled(threads, results)
+
+    async def respond_async(
+        self, handle_body: Callable[[list[str]], Awaitable[str]]
+    ) -> None:
         """
-        body = []
-        messages = thread.messages
-        for message in messages:
-            if message.html:
-                body.append(message.html)
-            elif message.plain:
-                body.append(message.plain)
-        last_message = messages[-1]
-        print("From: " + last_message.sender)
-        print("Snippet: " + last_message.snippet)
-        content = handle_body(body)
-        print("Response: " + content)
-        if self.send_type == "send":
-            self._send_message(last_message, content)
-        else:
-            self._draft_message(last_message, content)
-
-    def _send_message(self, message: Message, content: str):
-        """Responds to the thread.
+        Responds to the threads with an async Mirascope prompt, e.g. one that
+        returns `Reply(body=body).call_async()`.
 
-        Args:
-            message: The message to draft.
-            content: The content of the message.
+        The prompt calls run concurrently on the event loop, while the Gmail
+        requests run in a worker thread. If `handle_body` raises for some
+        threads, the others are still replied to before the first error is
+        raised.
         """
+        threads = await asyncio.to_thread(self._get_unread_threads)
+
+        # Limit concurrent calls to stay within the provider's rate limits.
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_CALLS)
+
+        async def handle_thread(thread: Thread) -> str:
+            async with semaphore:
+                return await handle_body(self._get_body(thread))
 
-        self.client.send_message(
-            sender=message.sender,
-            to=message.recipient,
-            subject=message.subject,
-            msg_html=content,
-            thread_id=message.thread_id,
-            in_reply_to=message.id,
+        results = await asyncio.gather(
+            *map(handle_thread, threads), return_exceptions=True
         )
-        message.mark_as_read()
+        await asyncio.to_thread(self._reply_to_handled, threads, results)
 
-    def _draft_message(self, message: Message, content: str):
-        """Drafts a message.
+    def _get_unread_threads(self) -> list[Thread]:
+        """Gets the unread threads that have a message body to reply to."""
+        return [
+            thread
+            for thread in self.client.get_threads(labels=[label.UNREAD])
+            if any(message.html or message.plain for message in thread.messages)
+        ]
+
+    def _reply_to_handled(
+        self, threads: list[Thread], results: Sequence[Union[str, BaseException]]
+    ) -> None:
+        """Replies to the threads that `handle_body` succeeded for.
 
         Args:
-            message: The message to draft.
-            content: The content of the message.
+            threads: The threads that were handled.
+            results: The content of the reply to each thread, or the error
+                `handle_body` raised for it.
+
+        Raises:
+            BaseException: The first error raised by `handle_body`, after the
+                other threads have been replied to.
         """
-        self.client.create_draft(
-            sender=message.sender,
-            to=message.recipient,
-            subject=message.subject,
-            msg_html=content,
-            thread_id=message.thread_id,
-            in_reply_to=message.id,
+        errors = [result for result in results if isinstance(result, BaseException)]
+        handled = [
+            (thread, result)
+            for thread, result in zip(threads, results)
+            if not isinstance(result, BaseException)
+        ]
+        self._reply(
+            [thread for thread, _ in handled], [content for _, content in handled]
         )
-        message.mark_as_read()
+        if errors:
+            raise errors[0]
+
+    def _reply(self, threads: list[Thread], contents: list[str]) -> None:
+        """Replies to the last message of each thread and marks it as read.
+
+        Args:
+            threads: The threads to reply to.
+            contents: The content of the reply to each thread.
+
+        Raises:
+            googleapiclient.errors.HttpError: A reply could not be sent. The
+                threads that were replied to are still marked as read.
+        """
+        if not threads:
+            return
+
+        last_messages = [thread.messages[-1] for thread in threads]
+        replies = []
+        for message, content in zip(last_messages, contents):
+            print("From: " + message.sender)
+            print("Snippet: " + message.snippet)
+            print("Response: " + content)
+            replies.append(self._create_reply(message, content))
+
+        # Mark the messages that were answered as read even if some replies
+        # failed, so that they aren't answered again on the next poll.
+        replied: list[Message] = []
+        try:
+            if self.send_type == "send":
+                results = self.client.send_messages(replies)
+            else:
+                results = self.client.create_drafts(replies)
+            errors = [result for result in results if isinstance(result, Exception)]
+            replied = [
+                message
+                for message, result in zip(last_messages, results)
+                if not isinstance(result, Exception)
+            ]
+            if errors:
+                raise errors[0]
+        finally:
+            self.client.mark_as_read(replied)
+
+    def _get_body(self, thread: Thread) -> list[str]:
+        """Gets the bodies of the messages in a thread.
+
+        Args:
+            thread: The thread to get the bodies of.
+
+        Returns:
+            The HTML body, or else the plain text body, of each message.
+        """
+        return [
+            body
+            for message in thread.messages
+            if (body := message.html or message.plain)
+        ]
+
+    def _create_reply(self, message: Message, content: str) -> dict:
+        """Creates the arguments for a reply to a message.
+
+        Args:
+            message: The message to reply to.
+            content: The content of the reply.
+
+        Returns:
+            The keyword arguments for `Gmail.send_message` or `Gmail.create_draft`.
+        """
+        return {
+            "sender": message.sender,
+            "to": message.recipient,
+            "subject": message.subject,
+            "msg_html": content,
+            "thread_id": message.thread_id,
+            "in_reply_to": message.id,
+        }
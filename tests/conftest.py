@@ -0,0 +1,64 @@
+"""Shared test fixtures"""
+
+from typing import Callable
+from unittest.mock import MagicMock
+
+import pytest
+from googleapiclient.discovery import Resource
+from googleapiclient.errors import HttpError
+
+
+class FakeBatch:
+    """A stand-in for `BatchHttpRequest` that answers each request with `respond`."""
+
+    def __init__(self, callback, respond: Callable[[dict], dict]):
+        self.callback = callback
+        self.respond = respond
+        self.requests: dict[str, dict] = {}
+
+    def add(self, request, request_id):
+        self.requests[request_id] = request
+
+    def execute(self):
+        for request_id, request in self.requests.items():
+            try:
+                response = self.respond(request)
+            except HttpError as error:
+                self.callback(request_id, None, error)
+            else:
+                self.callback(request_id, response, None)
+
+
+def _echo_id(request: dict) -> dict:
+    return {"id": request["id"]}
+
+
+@pytest.fixture
+def batch_service() -> Callable[..., MagicMock]:
+    """
+    Makes mock Gmail services whose batch requests are `FakeBatch` objects,
+    collected in the service's `batches` list. Requests, which are dicts with
+    an id, fail with a 404 if their id is in `fail_ids` and are otherwise
+    answered by `respond`, which by default echoes the id.
+    """
+
+    def make(
+        fail_ids: tuple[str, ...] = (), respond: Callable[[dict], dict] = _echo_id
+    ) -> MagicMock:
+        def respond_or_fail(request: dict) -> dict:
+            if request["id"] in fail_ids:
+                raise HttpError(MagicMock(status=404), b"")
+            return respond(request)
+
+        def new_batch_http_request(callback) -> FakeBatch:
+            batch = FakeBatch(callback, respond_or_fail)
+            service.batches.append(batch)
+            return batch
+
+        service = MagicMock(spec=Resource)
+        service.users = MagicMock()
+        service.batches = []
+        service.new_batch_http_request = new_batch_http_request
+        return service
+
+    return make
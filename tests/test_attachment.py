@@ -0,0 +1,212 @@
+"""Test Gmail attachment"""
+
+import base64
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Callable, Optional
+from unittest.mock import MagicMock, patch
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from miramail.gmail import attachment
+from miramail.gmail.attachment import Attachment, _QuotaBucket
+
+
+def _attachment(
+    filename: str = "file.txt", data: Optional[bytes] = None, msg_id: str = "m"
+) -> Attachment:
+    return Attachment(
+        service=MagicMock(),
+        user_id="me",
+        msg_id=msg_id,
+        id=f"{msg_id}-attachment",
+        filename=filename,
+        filetype="text/plain",
+        data=data,
+    )
+
+
+def _attachment_service(batch_service, fail_ids: tuple[str, ...] = ()) -> MagicMock:
+    def respond(request: dict) -> dict:
+        return {"data": base64.urlsafe_b64encode(request["id"].encode()).decode()}
+
+    service = batch_service(fail_ids, respond)
+    get = service.users.return_value.messages.return_value.attachments.return_value.get
+    get.side_effect = lambda userId, messageId, id: {"id": id}
+    return service
+
+
+@pytest.fixture(params=["pybase64", "binascii"])
+def urlsafe_b64decode(request, monkeypatch) -> Callable[[str], bytes]:
+    if request.param == "pybase64":
+        pytest.importorskip("pybase64")
+        return attachment._urlsafe_b64decode
+
+    # Load a separate copy of the module that can't import pybase64.
+    monkeypatch.setitem(sys.modules, "pybase64", None)
+    spec = importlib.util.spec_from_file_location(
+        "miramail.gmail._attachment_without_pybase64", attachment.__file__
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    assert "binascii" in vars(module)
+    return module._urlsafe_b64decode
+
+
+@pytest.mark.parametrize(
+    "data", [b"", b"\xfb", b"\xfb\xff", b"\xfb\xff\xbf", b"hello world\xfe\xff"]
+)
+def test_urlsafe_b64decode_unpadded(urlsafe_b64decode, data: bytes):
+    encoded = base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    assert urlsafe_b64decode(encoded) == data
+
+
+@patch.object(Attachment, "download")
+def test_save_existing_file(download_mock: MagicMock, tmp_path: Path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"old")
+
+    with pytest.raises(FileExistsError):
+        _attachment(str(path)).save()
+
+    download_mock.assert_not_called()
+    assert path.read_bytes() == b"old"
+
+
+def test_save_file_created_during_download(tmp_path: Path):
+    path = tmp_path / "file.txt"
+    attm = _attachment(str(path))
+
+    def download():
+        path.write_bytes(b"other")
+        attm.data = b"new"
+
+    with patch.object(Attachment, "download", side_effect=download):
+        with pytest.raises(FileExistsError):
+            attm.save()
+
+    assert path.read_bytes() == b"other"
+
+
+def test_save_overwrite(tmp_path: Path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"old contents")
+
+    _attachment(data=b"new").save(str(path), overwrite=True)
+
+    assert path.read_bytes() == b"new"
+
+
+@patch.object(Attachment, "download")
+def test_save_empty(download_mock: MagicMock, tmp_path: Path):
+    path = tmp_path / "empty.txt"
+
+    _attachment(str(path), data=b"").save()
+
+    download_mock.assert_not_called()
+    assert path.read_bytes() == b""
+
+
+def test_download_many(batch_service):
+    service = _attachment_service(batch_service)
+    attms = [_attachment(msg_id=str(i)) for i in range(160)]
+    for attm in attms[::16]:
+        attm.data = b"cached"
+    for attm in attms:
+        attm.service = service
+
+    Attachment.download_many(attms)
+
+    assert [len(batch.requests) for batch in service.batches] == [100, 50]
+    for i, attm in enumerate(attms):
+        assert attm.data == (b"cached" if i % 16 == 0 else f"{i}-attachment".encode())
+
+
+def test_download_many_error(batch_service):
+    service = _attachment_service(batch_service, fail_ids=("2-attachment",))
+    attms = [_attachment(msg_id=str(i)) for i in range(4)]
+    for attm in attms:
+        attm.service = service
+
+    with pytest.raises(HttpError):
+        Attachment.download_many(attms)
+
+    assert [attm.data for attm in attms] == [
+        b"0-attachment",
+        b"1-attachment",
+        None,
+        b"3-attachment",
+    ]
+
+
+def _parallel_service(fail_ids: tuple[str, ...] = ()) -> MagicMock:
+    def get(userId, messageId, id):
+        request = MagicMock()
+        if id in fail_ids:
+            request.execute.side_effect = HttpError(MagicMock(status=404), b"")
+        else:
+            data = base64.urlsafe_b64encode(id.encode()).decode()
+            request.execute.return_value = {"data": data}
+        return request
+
+    service = MagicMock()
+    attachments_api = service.users.return_value.messages.return_value.attachments
+    attachments_api.return_value.get.side_effect = get
+    return service
+
+
+def test_download_parallel():
+    service = _parallel_service()
+    attms = [_attachment(msg_id=str(i)) for i in range(20)]
+    attms[0].data = b"cached"
+    for attm in attms:
+        attm.service = service
+
+    Attachment.download_parallel(attms)
+
+    assert attms[0].data == b"cached"
+    assert [attm.data for attm in attms[1:]] == [
+        f"{i}-attachment".encode() for i in range(1, 20)
+    ]
+    get = service.users.return_value.messages.return_value.attachments.return_value.get
+    assert get.call_count == 19
+
+
+def test_download_parallel_error():
+    service = _parallel_service(fail_ids=("2-attachment",))
+    attms = [_attachment(msg_id=str(i)) for i in range(4)]
+    for attm in attms:
+        attm.service = service
+
+    with pytest.raises(HttpError):
+        Attachment.download_parallel(attms)
+
+    assert attms[2].data is None
+
+
+def test_quota_bucket_take(monkeypatch):
+    clock = [0.0]
+    sleeps: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(attachment.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(attachment.time, "sleep", sleep)
+    bucket = _QuotaBucket(capacity=10, per_second=10)
+
+    bucket.take(10)
+    assert sleeps == []
+
+    bucket.take(5)
+    assert sleeps == [pytest.approx(0.5)]
+
+    clock[0] += 60
+    bucket.take(10)
+    assert len(sleeps) == 1
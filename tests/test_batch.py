@@ -0,0 +1,60 @@
+"""Test Gmail batch requests"""
+
+from collections import Counter
+from unittest.mock import MagicMock
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from miramail.gmail import batch
+from miramail.gmail.batch import execute_batch
+
+
+def _flaky_service(batch_service, statuses: dict[str, list[int]], sent: Counter):
+    def respond(request: dict) -> dict:
+        attempt = sent[request["id"]]
+        sent[request["id"]] += 1
+        failures = statuses.get(request["id"], [])
+        if attempt < len(failures):
+            raise HttpError(MagicMock(status=failures[attempt]), b"")
+        return {"id": request["id"]}
+
+    return batch_service(respond=respond)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(batch, "_BACKOFF_SEC", 0)
+
+
+def test_execute_batch_retries_rate_limited(batch_service):
+    sent: Counter = Counter()
+    service = _flaky_service(batch_service, {"1": [429, 503], "2": [404]}, sent)
+
+    responses, errors = execute_batch(service, [{"id": str(i)} for i in range(4)])
+
+    assert responses == [{"id": "0"}, {"id": "1"}, None, {"id": "3"}]
+    assert list(errors) == [2]
+    assert sent == {"0": 1, "1": 3, "2": 1, "3": 1}
+
+
+def test_execute_batch_gives_up(batch_service):
+    sent: Counter = Counter()
+    service = _flaky_service(batch_service, {"0": [503] * 10}, sent)
+
+    responses, errors = execute_batch(service, [{"id": "0"}])
+
+    assert responses == [None]
+    assert isinstance(errors[0], HttpError)
+    assert sent["0"] == batch._MAX_ATTEMPTS
+
+
+def test_execute_batch_transport_error():
+    service = MagicMock()
+    service.new_batch_http_request.return_value.execute.side_effect = OSError()
+
+    responses, errors = execute_batch(service, [{"id": str(i)} for i in range(3)])
+
+    assert responses == [None, None, None]
+    assert sorted(errors) == [0, 1, 2]
+    assert all(isinstance(error, OSError) for error in errors.values())
@@ -0,0 +1,583 @@
+"""Test Gmail client"""
+
+import base64
+import time
+from email import message_from_bytes
+from pathlib import Path
+from typing import Optional
+from unittest.mock import MagicMock, patch
+
+import dateutil.parser as parser
+import pytest
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import Resource
+from googleapiclient.errors import HttpError
+
+from miramail.gmail.client import Gmail, _parse_date
+from miramail.gmail import label
+from miramail.gmail.attachment import Attachment
+from miramail.gmail.label import Label
+from miramail.gmail.message import Message
+from miramail.gmail.schemas import AttachmentMetadata
+
+
+def _gmail(service: Optional[MagicMock] = None) -> Gmail:
+    gmail = Gmail(_creds=MagicMock(spec=Credentials, valid=True))
+    gmail._service = service or MagicMock(spec=Resource)
+    return gmail
+
+
+@pytest.mark.parametrize("num_requests", [1, 100, 250])
+def test_execute_batch(batch_service, num_requests: int):
+    service = batch_service()
+    gmail = _gmail(service)
+
+    requests = [{"id": str(i)} for i in range(num_requests)]
+    responses = gmail._execute_batch(requests)
+
+    assert responses == requests
+    assert [len(batch.requests) for batch in service.batches] == [
+        min(100, num_requests - start) for start in range(0, num_requests, 100)
+    ]
+
+
+def test_execute_batch_error(batch_service):
+    gmail = _gmail(batch_service(fail_ids=("3",)))
+
+    with pytest.raises(HttpError):
+        gmail._execute_batch([{"id": str(i)} for i in range(5)])
+
+
+@patch.object(Gmail, "list_labels")
+def test_get_label_map(list_labels_mock: MagicMock):
+    list_labels_mock.return_value = [Label(id="INBOX", name="INBOX")]
+    gmail = _gmail()
+
+    assert gmail._get_label_map("me") == {"INBOX": "INBOX"}
+    gmail._get_label_map("me")
+    list_labels_mock.assert_called_once_with(user_id="me")
+
+    gmail._get_label_map("me", refresh=True)
+    assert list_labels_mock.call_count == 2
+
+
+@patch.object(Gmail, "list_labels")
+def test_build_message(list_labels_mock: MagicMock):
+    list_labels_mock.return_value = [Label(id="UNREAD", name="UNREAD")]
+    gmail = _gmail()
+    message = {
+        "id": "test_message_id",
+        "threadId": "test_thread_id",
+        "labelIds": ["UNREAD"],
+        "snippet": "Hi &amp; bye",
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "From", "value": "sender@example.com"},
+                {"name": "TO", "value": "test@example.com"},
+                {"name": "Subject", "value": "Test Subject"},
+                {"name": "Cc", "value": "a@example.com, b@example.com"},
+                {"name": "Date", "value": "not a date"},
+                {"name": "X-Custom", "value": "custom"},
+            ],
+            "body": {"data": "SGkgJiBieWU="},
+        },
+    }
+
+    msg = gmail._build_message("me", message)
+
+    assert msg.sender == "sender@example.com"
+    assert msg.recipient == "test@example.com"
+    assert msg.subject == "Test Subject"
+    assert msg.cc == ["a@example.com", "b@example.com"]
+    assert msg.bcc == []
+    assert msg.date == "not a date"
+    assert msg.snippet == "Hi & bye"
+    assert msg.plain == "Hi & bye"
+    assert msg.label_ids == ["UNREAD"]
+    assert msg.headers["X-Custom"] == "custom"
+    assert msg.headers["TO"] == "test@example.com"
+
+
+def test_create_message_signature():
+    service = MagicMock()
+    gmail = _gmail(service)
+    send_as = service.users.return_value.settings.return_value.sendAs
+    send_as.return_value.list.return_value.execute.return_value = {
+        "sendAs": [{"sendAsEmail": "Me@example.com", "signature": "<b>Me</b>"}]
+    }
+
+    for _ in range(2):
+        gmail._create_message(
+            "Me <me@example.com>",
+            "you@example.com",
+            msg_html="<p>Hi</p>",
+            signature=True,
+        )
+
+    send_as.return_value.list.assert_called_once_with(userId="me")
+    send_as.return_value.get.assert_not_called()
+
+
+def test_create_message_file_attachments(tmp_path: Path):
+    files = {
+        "notes.txt": "héllo\n".encode(),
+        "data.bin": bytes(range(256)) * 64,
+        "clip.mp4": b"\x00\xff" * 10,
+        "empty.pdf": b"",
+    }
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+
+    raw = _gmail()._create_message(
+        "me@example.com",
+        "you@example.com",
+        msg_plain="Hi",
+        attachments=[str(tmp_path / name) for name in files],
+    )["raw"]
+
+    msg = message_from_bytes(base64.urlsafe_b64decode(raw))
+    parts = {
+        part.get_filename(): part.get_payload(decode=True)
+        for part in msg.walk()
+        if part.get_filename()
+    }
+    assert parts == files
+
+
+def test_close(batch_service):
+    gmail = _gmail(batch_service())
+    gmail._execute_batch([{"id": str(i)} for i in range(250)])
+    pool = gmail._pool
+    gmail._execute_batch([{"id": str(i)} for i in range(250)])
+    assert gmail._pool is pool
+
+    gmail.close()
+    assert gmail._pool is None
+
+
+@patch.object(Gmail, "list_labels")
+def test_get_label_map_for(list_labels_mock: MagicMock):
+    list_labels_mock.return_value = [Label(id="INBOX", name="INBOX")]
+    gmail = _gmail()
+    messages: list[dict] = [{"labelIds": ["INBOX"]}, {}, {"labelIds": ["INBOX"]}]
+
+    assert gmail._get_label_map_for("me", messages) == {"INBOX": "INBOX"}
+    assert list_labels_mock.call_count == 1
+
+    list_labels_mock.return_value.append(Label(id="NEW", name="New"))
+    label_map = gmail._get_label_map_for("me", [*messages, {"labelIds": ["NEW"]}])
+    assert label_map.keys() == {"INBOX", "NEW"}
+    assert list_labels_mock.call_count == 2
+
+
+def test_create_message_metadata_attachments():
+    attachments = [
+        AttachmentMetadata(
+            raw_data="héllo".encode(), file_name="a.txt", content_type="text/plain"
+        ),
+        AttachmentMetadata(
+            raw_data=b"\x89PNG", file_name="b.png", content_type="image/png"
+        ),
+        AttachmentMetadata(
+            raw_data=b"\x00\xff", file_name="c.mp4", content_type="video/mp4"
+        ),
+        AttachmentMetadata(raw_data=b"%PDF", file_name="d.pdf"),
+    ]
+
+    raw = _gmail()._create_message(
+        "me@example.com", "you@example.com", attachments=list(attachments)
+    )["raw"]
+
+    msg = message_from_bytes(base64.urlsafe_b64decode(raw))
+    parts = {
+        part.get_filename(): (part.get_content_type(), part.get_payload(decode=True))
+        for part in msg.walk()
+        if part.get_filename()
+    }
+    assert parts == {
+        attachment.file_name: (attachment.content_type, attachment.raw_data)
+        for attachment in attachments
+    }
+
+
+@patch.object(Gmail, "_get_threads_from_refs")
+def test_get_threads_pages(get_threads_from_refs_mock: MagicMock):
+    pages = {
+        None: {"threads": [{"id": "1"}, {"id": "2"}], "nextPageToken": "a"},
+        "a": {"threads": [{"id": "3"}], "nextPageToken": "b"},
+        "b": {"resultSizeEstimate": 0},
+    }
+    service = MagicMock()
+    threads = service.users.return_value.threads.return_value
+    threads.list.side_effect = lambda **kwargs: MagicMock(
+        execute=MagicMock(return_value=pages[kwargs["pageToken"]])
+    )
+    get_threads_from_refs_mock.side_effect = lambda user_id, refs, attachments: [
+        ref["id"] for ref in refs
+    ]
+
+    assert _gmail(service).get_threads() == ["1", "2", "3"]
+    assert [call.kwargs["pageToken"] for call in threads.list.call_args_list] == [
+        None,
+        "a",
+        "b",
+    ]
+    assert {call.kwargs["maxResults"] for call in threads.list.call_args_list} == {500}
+
+
+@pytest.fixture
+def new_york_tz(monkeypatch):
+    # Dates are converted to local time, so compare them outside of UTC.
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    _parse_date.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    _parse_date.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "Mon, 3 Jun 2024 10:00:00 -0700",
+        "Mon, 3 Jun 2024 10:00:00 -0700 (PDT)",
+        "3 Jun 2024 10:00:00 +0000",
+        "Wed, 14 Oct 2026 10:00:00 -0000",
+        "2024-06-03T10:00:00Z",
+    ],
+)
+def test_parse_date(new_york_tz, value: str):
+    assert _parse_date(value) == str(parser.parse(value).astimezone())
+
+
+def test_parse_date_unknown_zone(new_york_tz):
+    assert _parse_date("Wed, 14 Oct 2026 10:00:00 -0000") == (
+        "2026-10-14 06:00:00-04:00"
+    )
+
+
+@pytest.mark.parametrize("value", ["not a date", ""])
+def test_parse_date_invalid(value: str):
+    assert _parse_date(value) == value
+
+
+@pytest.mark.parametrize("attachments", ["ignore", "reference", "download"])
+def test_build_message_parts(attachments: str):
+    def text(mime_type: str, value: str) -> dict:
+        data = base64.urlsafe_b64encode(value.encode()).decode()
+        return {"mimeType": mime_type, "filename": "", "body": {"data": data}}
+
+    message = {
+        "id": "test_message_id",
+        "threadId": "test_thread_id",
+        "snippet": "",
+        "payload": {
+            "mimeType": "multipart/mixed",
+            "headers": [],
+            "body": {},
+            "parts": [
+                {
+                    "mimeType": "multipart/alternative",
+                    "filename": "",
+                    "body": {},
+                    "parts": [
+                        text("text/plain", "One"),
+                        text("text/html", "<p>One</p>"),
+                    ],
+                },
+                text("text/plain", "Two"),
+                {
+                    "mimeType": "application/pdf",
+                    "filename": "",
+                    "body": {"attachmentId": "att", "data": "JVBERg=="},
+                },
+            ],
+        },
+    }
+
+    msg = _gmail()._build_message("me", message, attachments)
+
+    assert msg.plain == "One\nTwo"
+    assert msg.html == "<body><p>One</p></body>"
+    if attachments == "ignore":
+        assert msg.attachments == []
+    else:
+        assert msg.attachments is not None
+        [attm] = msg.attachments
+        assert (attm.id, attm.filename, attm.filetype) == (
+            "att",
+            "unknown",
+            "application/pdf",
+        )
+        assert attm.data == (b"%PDF" if attachments == "download" else None)
+
+
+@pytest.mark.parametrize(
+    "method", ["_get_messages_from_refs", "_get_threads_from_refs"]
+)
+@patch.object(Attachment, "download_many")
+@patch.object(Gmail, "_get_label_map_for", return_value={})
+def test_get_from_refs_downloads_once(
+    label_map_mock: MagicMock, download_many_mock: MagicMock, method: str
+):
+    def message(i: int) -> dict:
+        attachment = {
+            "mimeType": "application/pdf",
+            "filename": f"{i}.pdf",
+            "body": {"attachmentId": f"att{i}"},
+        }
+        return {
+            "id": str(i),
+            "threadId": str(i),
+            "snippet": "",
+            "payload": {
+                "mimeType": "multipart/mixed",
+                "headers": [],
+                "body": {},
+                "parts": [attachment],
+            },
+        }
+
+    jsons = [message(i) for i in range(3)]
+    if method == "_get_threads_from_refs":
+        jsons = [{"id": m["id"], "messages": [m]} for m in jsons]
+    gmail = _gmail(MagicMock())
+
+    with patch.object(Gmail, "_execute_batch", return_value=jsons):
+        getattr(gmail, method)("me", [{"id": str(i)} for i in range(3)], "download")
+
+    download_many_mock.assert_called_once()
+    [attms] = download_many_mock.call_args.args
+    assert [attm.id for attm in attms] == ["att0", "att1", "att2"]
+
+
+def test_create_message_simple():
+    response = _gmail()._create_message(
+        "me@example.com",
+        "you@example.com",
+        subject="Hi",
+        msg_plain="Hi",
+        msg_html="<p>Hi</p>",
+        cc=["a@example.com", "b@example.com"],
+        thread_id="test_thread_id",
+    )
+
+    msg = message_from_bytes(base64.urlsafe_b64decode(response["raw"]))
+    assert response["threadId"] == "test_thread_id"
+    assert msg.get_content_type() == "multipart/alternative"
+    assert (msg["To"], msg["From"], msg["Subject"], msg["Cc"]) == (
+        "you@example.com",
+        "me@example.com",
+        "Hi",
+        "a@example.com, b@example.com",
+    )
+    assert [part.get_content_type() for part in msg.get_payload()] == [
+        "text/plain",
+        "text/html",
+    ]
+
+
+def test_modify_labels():
+    service = MagicMock(spec=Resource)
+    service.users = MagicMock()
+    gmail = _gmail(service)
+    batch_modify = service.users.return_value.messages.return_value.batchModify
+    messages = [
+        Message(
+            service=service,
+            user_id="me",
+            id=str(i),
+            thread_id=str(i),
+            recipient="test@example.com",
+            sender="sender@example.com",
+            subject="Test Subject",
+            date="2023-06-01",
+            snippet="",
+            headers={},
+            label_ids=["INBOX", "UNREAD"],
+        )
+        for i in range(1500)
+    ]
+
+    gmail.modify_labels(messages, to_add=[label.STARRED], to_remove=["UNREAD"])
+
+    assert [
+        len(call.kwargs["body"]["ids"]) for call in batch_modify.call_args_list
+    ] == [1000, 500]
+    assert batch_modify.call_args.kwargs["body"]["addLabelIds"] == ["STARRED"]
+    assert batch_modify.call_args.kwargs["body"]["removeLabelIds"] == ["UNREAD"]
+    assert all(message.label_ids == ["INBOX", "STARRED"] for message in messages)
+
+    batch_modify.reset_mock()
+    gmail.mark_as_read([])
+    batch_modify.assert_not_called()
+
+
+@pytest.mark.parametrize("method", ["send_messages", "create_drafts"])
+def test_send_messages_batched(batch_service, method: str):
+    service = batch_service()
+    gmail = _gmail(service)
+    messages_api = service.users.return_value.messages.return_value
+    drafts_api = service.users.return_value.drafts.return_value
+    messages_api.send.side_effect = lambda userId, body: {"id": body["threadId"]}
+    drafts_api.create.side_effect = lambda userId, body: {
+        "id": body["message"]["threadId"]
+    }
+
+    replies = [
+        {"sender": "me@example.com", "to": "you@example.com", "thread_id": str(i)}
+        for i in range(150)
+    ]
+    responses = getattr(gmail, method)(replies)
+
+    assert responses == [{"id": str(i)} for i in range(150)]
+    assert [len(batch.requests) for batch in service.batches] == [100, 50]
+
+
+@pytest.mark.parametrize("method", ["send_messages", "create_drafts"])
+def test_send_messages_user_id(batch_service, method: str):
+    gmail = _gmail(batch_service())
+    replies = [
+        {"sender": "me@example.com", "to": "you@example.com"},
+        {"sender": "me@example.com", "to": "you@example.com", "user_id": "alias"},
+    ]
+
+    with patch.object(Gmail, "_create_message", return_value={"id": "1"}) as create:
+        getattr(gmail, method)(replies, user_id="default")
+
+    assert [call.kwargs["user_id"] for call in create.call_args_list] == [
+        "default",
+        "alias",
+    ]
+
+
+@pytest.mark.parametrize("method", ["send_messages", "create_drafts"])
+def test_send_messages_partial_failure(batch_service, method: str):
+    service = batch_service(fail_ids=("t3",))
+    gmail = _gmail(service)
+    messages_api = service.users.return_value.messages.return_value
+    drafts_api = service.users.return_value.drafts.return_value
+    messages_api.send.side_effect = lambda userId, body: {"id": body["threadId"]}
+    drafts_api.create.side_effect = lambda userId, body: {
+        "id": body["message"]["threadId"]
+    }
+
+    replies = [
+        {"sender": "me@example.com", "to": "you@example.com", "thread_id": f"t{i}"}
+        for i in range(5)
+    ]
+    results = getattr(gmail, method)(replies)
+
+    assert isinstance(results[3], HttpError)
+    assert [r for i, r in enumerate(results) if i != 3] == [
+        {"id": f"t{i}"} for i in (0, 1, 2, 4)
+    ]
+
+
+def test_list_labels():
+    service = MagicMock()
+    service.users.return_value.labels.return_value.list.return_value.execute.return_value = {
+        "labels": [
+            {
+                "id": "CHAT",
+                "name": "CHAT",
+                "type": "system",
+                "messageListVisibility": "hide",
+                "labelListVisibility": "labelHide",
+            },
+            {"id": "INBOX", "name": "INBOX", "type": "system"},
+            {"id": "UNREAD", "name": "UNREAD", "type": "system"},
+            {
+                "id": "CATEGORY_SOCIAL",
+                "name": "CATEGORY_SOCIAL",
+                "type": "system",
+                "messageListVisibility": "hide",
+                "labelListVisibility": "labelHide",
+            },
+            {
+                "id": "Label_1",
+                "name": "Receipts",
+                "type": "user",
+                "messageListVisibility": "show",
+                "labelListVisibility": "labelShow",
+            },
+            {
+                "id": "Label_2",
+                "name": "Later",
+                "type": "user",
+                "messageListVisibility": "show",
+                "labelListVisibility": "labelShowIfUnread",
+            },
+        ]
+    }
+
+    labels = _gmail(service).list_labels()
+
+    assert [lbl.id for lbl in labels] == [
+        "CHAT",
+        "INBOX",
+        "UNREAD",
+        "CATEGORY_SOCIAL",
+        "Label_1",
+        "Label_2",
+    ]
+    assert all(isinstance(lbl, Label) for lbl in labels)
+    assert labels[1] == label.INBOX
+    assert [lbl.label_list_visibility for lbl in labels] == [
+        "label_hide",
+        None,
+        None,
+        "label_hide",
+        "label_show",
+        "label_show_if_unread",
+    ]
+    assert labels[4].type == "user"
+    assert labels[4].message_list_visibility == "show"
+
+
+def test_get_history_id():
+    service = MagicMock()
+    get_profile = service.users.return_value.getProfile
+    get_profile.return_value.execute.return_value = {"historyId": "42"}
+
+    assert _gmail(service).get_history_id() == "42"
+    get_profile.assert_called_once_with(userId="me")
+
+
+def test_get_history():
+    service = MagicMock()
+    history_list = service.users.return_value.history.return_value.list
+    history_list.return_value.execute.side_effect = [
+        {"history": [{"id": "1"}], "nextPageToken": "page2", "historyId": "5"},
+        {"history": [{"id": "2"}], "nextPageToken": "page3", "historyId": "6"},
+        {"historyId": "7"},
+    ]
+
+    records, history_id = _gmail(service).get_history(
+        "1", history_types=["messageAdded"], filter_label=label.UNREAD
+    )
+
+    assert records == [{"id": "1"}, {"id": "2"}]
+    assert history_id == "7"
+    params = {
+        "userId": "me",
+        "startHistoryId": "1",
+        "historyTypes": ["messageAdded"],
+        "labelId": "UNREAD",
+    }
+    assert [call.kwargs for call in history_list.call_args_list] == [
+        params,
+        {**params, "pageToken": "page2"},
+        {**params, "pageToken": "page3"},
+    ]
+
+
+def test_get_history_all_types():
+    service = MagicMock()
+    history_list = service.users.return_value.history.return_value.list
+    history_list.return_value.execute.return_value = {"historyId": "2"}
+
+    assert _gmail(service).get_history("1") == ([], "2")
+    history_list.assert_called_once_with(userId="me", startHistoryId="1")
@@ -0,0 +1,73 @@
+"""Test Gmail labels"""
+
+import pytest
+from pydantic import ValidationError
+
+from miramail.gmail import label
+
+
+def test_intern_id():
+    assert label.intern_id("".join(["UN", "READ"])) is label.UNREAD.id
+
+    custom = label.intern_id("".join(["Label_", "1"]))
+    assert custom == "Label_1"
+    assert label.intern_id("".join(["Label_", "1"])) is custom
+
+
+def test_label_eq():
+    assert label.UNREAD == "UNREAD"
+    assert label.UNREAD == label.Label(id="UNREAD", name="Unread")
+    assert label.UNREAD != "INBOX"
+    assert label.UNREAD != 1
+
+
+def test_label_parse():
+    parsed = label.Label.parse(
+        {
+            "id": "Label_1",
+            "name": "Receipts",
+            "type": "user",
+            "messageListVisibility": "show",
+            "labelListVisibility": "labelShow",
+        }
+    )
+
+    assert parsed == label.Label(
+        id="Label_1",
+        name="Receipts",
+        message_list_visibility="show",
+        label_list_visibility="label_show",
+        type="user",
+    )
+    assert parsed.type == "user"
+    assert parsed.label_list_visibility == "label_show"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("labelShow", "label_show"),
+        ("labelHide", "label_hide"),
+        ("labelShowIfUnread", "label_show_if_unread"),
+        (None, None),
+    ],
+)
+def test_label_parse_label_list_visibility(value, expected):
+    data = {"id": "CHAT", "name": "CHAT", "type": "system"}
+    if value is not None:
+        data["labelListVisibility"] = value
+
+    assert label.Label.parse(data).label_list_visibility == expected
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"id": "Label_1", "name": "Receipts", "type": "other"},
+        {"id": "Label_1", "name": "Receipts", "labelListVisibility": "labelShown"},
+        {"id": "Label_1", "name": "Receipts", "messageListVisibility": "shown"},
+    ],
+)
+def test_label_parse_invalid(data):
+    with pytest.raises(ValidationError):
+        label.Label.parse(data)
@@ -0,0 +1,81 @@
+"""Test Gmail message"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from googleapiclient.discovery import Resource
+
+from miramail.gmail import label
+from miramail.gmail.message import Message
+
+
+def _message(service: MagicMock) -> Message:
+    return Message(
+        service=service,
+        user_id="me",
+        id="test_message_id",
+        thread_id="test_thread_id",
+        recipient="test@example.com",
+        sender="sender@example.com",
+        subject="Test Subject",
+        date="2023-06-01",
+        snippet="",
+        headers={},
+        label_ids=["INBOX", "UNREAD"],
+    )
+
+
+@pytest.mark.parametrize(
+    "to_add, to_remove, body",
+    [
+        (label.STARRED, [], {"addLabelIds": ["STARRED"], "removeLabelIds": []}),
+        (
+            [label.STARRED, "Label_1"],
+            "UNREAD",
+            {"addLabelIds": ["STARRED", "Label_1"], "removeLabelIds": ["UNREAD"]},
+        ),
+    ],
+)
+def test_modify_labels(to_add, to_remove, body):
+    service = MagicMock(spec=Resource)
+    service.users = MagicMock()
+    modify = service.users.return_value.messages.return_value.modify
+    modify.return_value.execute.return_value = {
+        "labelIds": ["INBOX", *body["addLabelIds"]]
+    }
+    message = _message(service)
+
+    message.modify_labels(to_add, to_remove)
+
+    assert modify.call_args.kwargs["body"] == body
+    assert message.label_ids == ["INBOX", *body["addLabelIds"]]
+
+
+def test_modify_labels_noop():
+    service = MagicMock(spec=Resource)
+    service.users = MagicMock()
+    message = _message(service)
+
+    message.modify_labels([], [])
+
+    service.users.assert_not_called()
+    assert message.label_ids == ["INBOX", "UNREAD"]
+
+
+def test_create_update_labels_shared():
+    message = _message(MagicMock(spec=Resource))
+
+    body = message._create_update_labels(["UNREAD"], [])
+    assert body == {"addLabelIds": ["UNREAD"], "removeLabelIds": []}
+    assert message._create_update_labels(["UNREAD"]) is body
+
+
+def test_modify_labels_unexpected_labels():
+    service = MagicMock(spec=Resource)
+    service.users = MagicMock()
+    modify = service.users.return_value.messages.return_value.modify
+    modify.return_value.execute.return_value = {"labelIds": ["INBOX", "UNREAD"]}
+    message = _message(service)
+
+    with pytest.raises(AssertionError):
+        message.modify_labels(label.STARRED, label.UNREAD)
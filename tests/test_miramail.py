@@ -1,11 +1,13 @@
 """Test Miramail"""
 
+import asyncio
+import dataclasses
 from typing import Literal
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 import pytest
-from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import Resource
+from googleapiclient.errors import HttpError
 
 from miramail.gmail.client import Gmail
 from miramail.gmail.message import Message
@@ -13,6 +15,10 @@ from miramail.gmail.thread import Thread
 from miramail.miramail import MiraMail
 
 
+def _sent(replies: list[dict]) -> list[dict]:
+    return [{"id": reply["in_reply_to"]} for reply in replies]
+
+
 @pytest.mark.parametrize(
     "send_type",
     [
@@ -26,7 +32,6 @@ from miramail.miramail import MiraMail
         [
             Message(
                 service=MagicMock(spec=Resource),
-                creds=MagicMock(spec=Credentials),
                 user_id="test_user",
                 id="test_message_id",
                 thread_id="test_thread_id",
@@ -43,7 +48,6 @@ from miramail.miramail import MiraMail
         [
             Message(
                 service=MagicMock(spec=Resource),
-                creds=MagicMock(spec=Credentials),
                 user_id="test_user",
                 id="test_message_id",
                 thread_id="test_thread_id",
@@ -60,15 +64,13 @@ from miramail.miramail import MiraMail
         [],
     ],
 )
-@patch.object(Message, "modify_labels", return_value=MagicMock())
 def test_respond(
-    modify_labels_mock: MagicMock,
     messages: list[Message],
     send_type: Literal["send", "draft"],
 ):
-    gmail = MagicMock(spec=Gmail, send_type=send_type)
-    gmail.send_message = MagicMock()
-    gmail.create_draft = MagicMock()
+    gmail = MagicMock(spec=Gmail)
+    gmail.send_messages.side_effect = _sent
+    gmail.create_drafts.side_effect = _sent
 
     thread1 = MagicMock(spec=Thread)
     thread1.messages = messages
@@ -82,3 +84,125 @@ def test_respond(
     miramail.respond(handle_body_mock)
 
     gmail.get_threads.assert_called_once_with(labels=["UNREAD"])
+    replies = gmail.send_messages if send_type == "send" else gmail.create_drafts
+    if not messages:
+        replies.assert_not_called()
+        gmail.mark_as_read.assert_not_called()
+        return
+    replies.assert_called_once()
+    assert [reply["in_reply_to"] for reply in replies.call_args.args[0]] == [
+        message.id for message in messages[-1:]
+    ]
+    gmail.mark_as_read.assert_called_once_with(messages[-1:])
+
+
+def test_respond_async():
+    message = Message(
+        service=MagicMock(spec=Resource),
+        user_id="test_user",
+        id="test_message_id",
+        thread_id="test_thread_id",
+        recipient="test@example.com",
+        sender="sender@example.com",
+        subject="Test Subject",
+        date="2023-06-01",
+        snippet="Test message snippet",
+        plain="Test plain text body",
+        headers={},
+        label_ids=["INBOX", "UNREAD"],
+    )
+    gmail = MagicMock(spec=Gmail)
+    gmail.send_messages.side_effect = _sent
+    gmail.get_threads = MagicMock(
+        return_value=[
+            MagicMock(spec=Thread, messages=[message]),
+            MagicMock(spec=Thread, messages=[]),
+            MagicMock(
+                spec=Thread,
+                messages=[dataclasses.replace(message, id="empty", plain=None)],
+            ),
+        ]
+    )
+    miramail = MiraMail(client=gmail, send_type="send")
+
+    async def handle_body_mock(body: list[str]) -> str:
+        assert body
+        await asyncio.sleep(0)
+        return "\n".join(body)
+
+    asyncio.run(miramail.respond_async(handle_body_mock))
+
+    [reply] = gmail.send_messages.call_args.args[0]
+    assert reply["msg_html"] == "Test plain text body"
+    assert reply["in_reply_to"] == "test_message_id"
+    gmail.mark_as_read.assert_called_once_with([message])
+
+
+def _messages(count: int) -> list[Message]:
+    return [
+        Message(
+            service=MagicMock(spec=Resource),
+            user_id="test_user",
+            id=f"t{i}",
+            thread_id=f"t{i}",
+            recipient="test@example.com",
+            sender="sender@example.com",
+            subject="Test Subject",
+            date="2023-06-01",
+            snippet="Test message snippet",
+            plain=f"Body {i}",
+            headers={},
+            label_ids=["INBOX", "UNREAD"],
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("send_type", ["send", "draft"])
+def test_respond_partial_failure(send_type: Literal["send", "draft"]):
+    messages = _messages(5)
+    error = HttpError(MagicMock(status=500), b"")
+    gmail = MagicMock(spec=Gmail)
+    gmail.get_threads = MagicMock(
+        return_value=[MagicMock(spec=Thread, messages=[m]) for m in messages]
+    )
+    results = [error if m.id == "t3" else {"id": m.id} for m in messages]
+    gmail.send_messages.return_value = results
+    gmail.create_drafts.return_value = results
+    miramail = MiraMail(client=gmail, send_type=send_type)
+
+    with pytest.raises(HttpError):
+        miramail.respond(lambda body: "Reply")
+
+    gmail.mark_as_read.assert_called_once_with([m for m in messages if m.id != "t3"])
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_respond_handle_body_failure(use_async: bool):
+    messages = _messages(5)
+    gmail = MagicMock(spec=Gmail)
+    gmail.send_messages.side_effect = _sent
+    gmail.get_threads = MagicMock(
+        return_value=[MagicMock(spec=Thread, messages=[m]) for m in messages]
+    )
+    miramail = MiraMail(client=gmail, send_type="send")
+
+    def handle_body(body: list[str]) -> str:
+        if body == ["Body 3"]:
+            raise ValueError("LLM call failed")
+        return "Reply"
+
+    async def handle_body_async(body: list[str]) -> str:
+        await asyncio.sleep(0)
+        return handle_body(body)
+
+    with pytest.raises(ValueError):
+        if use_async:
+            asyncio.run(miramail.respond_async(handle_body_async))
+        else:
+            miramail.respond(handle_body)
+
+    replied = [m for m in messages if m.id != "t3"]
+    [replies] = gmail.send_messages.call_args.args
+    assert [reply["in_reply_to"] for reply in replies] == [m.id for m in replied]
+    gmail.mark_as_read.assert_called_once_with(replied)
@@ -0,0 +1,68 @@
+"""Test Gmail transport"""
+
+import datetime
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from google.oauth2.credentials import Credentials
+
+from miramail.gmail.transport import AuthorizedHttpx, JsonModel
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b'{"id": "1", "labelIds": ["INBOX"]}', {"id": "1", "labelIds": ["INBOX"]}),
+        ('{"id": "1"}', {"id": "1"}),
+        (b"Not Found", "Not Found"),
+        ("", ""),
+    ],
+)
+def test_json_model_deserialize(content, expected):
+    assert JsonModel().deserialize(content) == expected
+
+
+def test_json_model_data_wrapper():
+    assert JsonModel(data_wrapper=True).deserialize(b'{"data": {"id": "1"}}') == {
+        "id": "1"
+    }
+
+
+def test_authorized_httpx_refreshes_on_401():
+    credentials = MagicMock(spec=Credentials, expiry=None)
+    client = MagicMock(spec=httpx.Client)
+    client.request.side_effect = [
+        httpx.Response(401),
+        httpx.Response(
+            200, content=b"{}", headers={"content-type": "application/json"}
+        ),
+    ]
+    http = AuthorizedHttpx(credentials, client=client)
+
+    response, content = http.request("https://example.com", headers={"a": "b"})
+
+    credentials.before_request.assert_called_once()
+    credentials.refresh.assert_called_once()
+    credentials.apply.assert_called_once()
+    assert response.status == 200
+    assert response["content-type"] == "application/json"
+    assert content == b"{}"
+
+
+@pytest.mark.parametrize("minutes, refreshed", [(2, True), (30, False)])
+def test_authorized_httpx_refreshes_before_expiry(minutes, refreshed):
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    credentials = MagicMock(
+        spec=Credentials,
+        expiry=now + datetime.timedelta(minutes=minutes),
+        refresh_token="token",
+    )
+    client = MagicMock(spec=httpx.Client)
+    client.request.return_value = httpx.Response(200, content=b"{}")
+    http = AuthorizedHttpx(credentials, client=client)
+
+    http.request("https://example.com")
+
+    assert credentials.refresh.called is refreshed
+    credentials.before_request.assert_called_once()